@@ -1,86 +1,346 @@
 import os
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
+import sys
+import time
+import argparse
 
 FILE_NAME = "Factory_ERP.xlsx"
 
+# -------------------------------------------------------
+# ERP SCHEMA
+# One entry per sheet/table. "key" is the unique business key (None when
+# rows are only identified by the store's surrogate id) and "indexes" lists
+# the columns the transactional store indexes for lookups.
+# -------------------------------------------------------
+TEXT = "text"
+NUMBER = "number"
+INTEGER = "integer"
+DATE = "date"
+DATETIME = "datetime"
 
-def create_erp_file():
+ERP_SCHEMA = {
+    # Masters
+    "Customer Master": {
+        "columns": [("Customer ID", TEXT), ("Customer Name", TEXT), ("Contact", TEXT), ("Email", TEXT),
+                    ("Address", TEXT), ("GST", TEXT), ("Payment Terms", TEXT)],
+        "key": "Customer ID",
+        "indexes": ["Customer Name"],
+    },
+    "Vendor Master": {
+        "columns": [("Vendor ID", TEXT), ("Vendor Name", TEXT), ("Material Supplied", TEXT), ("Phone", TEXT),
+                    ("GST", TEXT), ("Lead Time", INTEGER)],
+        "key": "Vendor ID",
+        "indexes": ["Vendor Name"],
+    },
+    "Item Master": {
+        "columns": [("Item Code", TEXT), ("Item Name", TEXT), ("Category", TEXT), ("Unit", TEXT),
+                    ("Standard Cost", NUMBER), ("Min Stock", NUMBER)],
+        "key": "Item Code",
+        "indexes": ["Item Name", "Category"],
+    },
+
+    # BOM
+    "BOM": {
+        "columns": [("Product Code", TEXT), ("Raw Material Code", TEXT), ("Quantity Required", NUMBER),
+                    ("Unit", TEXT)],
+        "key": None,
+        "indexes": ["Product Code", "Raw Material Code"],
+    },
+
+    # Purchase
+    "Purchase Orders": {
+        "columns": [("PO Number", TEXT), ("Date", DATE), ("Vendor", TEXT), ("Item", TEXT), ("Quantity", NUMBER),
+                    ("Rate", NUMBER), ("Expected Delivery", DATE), ("Status", TEXT)],
+        "key": "PO Number",
+        "indexes": ["Vendor", "Item", "Status"],
+    },
+    "GRN": {
+        "columns": [("GRN Number", TEXT), ("Date", DATE), ("PO Number", TEXT), ("Item", TEXT),
+                    ("Received Qty", NUMBER), ("Accepted Qty", NUMBER), ("Rejected Qty", NUMBER)],
+        "key": "GRN Number",
+        "indexes": ["PO Number", "Item", "Date"],
+    },
+
+    # Production
+    "Production Plan": {
+        "columns": [("Plan Number", TEXT), ("Date", DATE), ("Product", TEXT), ("Planned Qty", NUMBER),
+                    ("Start Date", DATE), ("End Date", DATE), ("Status", TEXT)],
+        "key": "Plan Number",
+        "indexes": ["Product", "Status"],
+    },
+    "Job Cards": {
+        "columns": [("Job Card No", TEXT), ("Plan Number", TEXT), ("Product", TEXT), ("Quantity", NUMBER),
+                    ("Operation", TEXT), ("Machine", TEXT), ("Operator", TEXT), ("Start Time", DATETIME),
+                    ("End Time", DATETIME), ("Status", TEXT)],
+        "key": "Job Card No",
+        "indexes": ["Plan Number", "Machine", "Status"],
+    },
+    # Line items of vendor job cards (see jobcard_repo.py); columns match
+    # the tables on the Streamlit form and the PDF
+    "Job Card Items": {
+        "columns": [("Job Card No", TEXT), ("Line No", INTEGER), ("Description", TEXT), ("Drawing No", TEXT),
+                    ("Drawing Link", TEXT), ("Grade", TEXT), ("Qty", NUMBER), ("UOM", TEXT)],
+        "key": None,
+        "indexes": ["Job Card No"],
+    },
+    "Job Card Materials": {
+        "columns": [("Job Card No", TEXT), ("Line No", INTEGER), ("Raw Material", TEXT), ("Heat No", TEXT),
+                    ("Dia/Size", TEXT), ("Weight", NUMBER), ("Qty", NUMBER), ("Remark", TEXT)],
+        "key": None,
+        "indexes": ["Job Card No"],
+    },
+    "Job Card GRN": {
+        "columns": [("Job Card No", TEXT), ("Line No", INTEGER), ("Date", TEXT), ("Qty Received", NUMBER),
+                    ("OK Qty", NUMBER), ("Rejected Qty", NUMBER), ("Remarks", TEXT), ("QC Approved By", TEXT)],
+        "key": None,
+        "indexes": ["Job Card No"],
+    },
+    "Production Entry": {
+        "columns": [("Date", DATE), ("Job Card No", TEXT), ("Product", TEXT), ("Produced Qty", NUMBER),
+                    ("Rejected Qty", NUMBER), ("Shift", TEXT)],
+        "key": None,
+        "indexes": ["Date", "Job Card No", "Product"],
+    },
+
+    # Inventory
+    "Raw Material Inventory": {
+        "columns": [("Item Code", TEXT), ("Opening Stock", NUMBER), ("Received", NUMBER), ("Issued", NUMBER),
+                    ("Balance", NUMBER)],
+        "key": "Item Code",
+        "indexes": [],
+    },
+    "Finished Goods Inventory": {
+        "columns": [("Product", TEXT), ("Opening Stock", NUMBER), ("Produced", NUMBER), ("Dispatched", NUMBER),
+                    ("Balance", NUMBER)],
+        "key": "Product",
+        "indexes": [],
+    },
+    # Append-only stock movements behind both inventory sheets (see
+    # erp_inventory.py). Qty is signed: receipts positive, issues negative.
+    "Stock Ledger": {
+        "columns": [("Date", DATE), ("Stock Type", TEXT), ("Item", TEXT), ("Movement", TEXT),
+                    ("Reference", TEXT), ("Qty", NUMBER)],
+        "key": None,
+        "indexes": ["Item", "Date", "Reference"],
+    },
+
+    # Sales
+    "Sales Orders": {
+        "columns": [("SO Number", TEXT), ("Customer", TEXT), ("Product", TEXT), ("Quantity", NUMBER),
+                    ("Delivery Date", DATE), ("Status", TEXT)],
+        "key": "SO Number",
+        "indexes": ["Customer", "Product", "Status"],
+    },
+    "Dispatch": {
+        "columns": [("Dispatch No", TEXT), ("SO Number", TEXT), ("Product", TEXT), ("Quantity", NUMBER),
+                    ("Dispatch Date", DATE), ("Transport", TEXT), ("Invoice No", TEXT)],
+        "key": "Dispatch No",
+        "indexes": ["SO Number", "Product", "Invoice No"],
+    },
+    "Invoices": {
+        "columns": [("Invoice No", TEXT), ("Customer", TEXT), ("Amount", NUMBER), ("Paid", NUMBER),
+                    ("Pending", NUMBER), ("Due Date", DATE)],
+        "key": "Invoice No",
+        "indexes": ["Customer", "Due Date"],
+    },
+
+    # Dashboard rollups (see erp_dashboard.py). "derived" tables are
+    # maintained from the sheets above and shown on the Dashboard sheet
+    # rather than exported/imported as sheets of their own.
+    "Daily Production": {
+        "columns": [("Rollup Key", TEXT), ("Date", DATE), ("Shift", TEXT), ("Job Card No", TEXT),
+                    ("Produced Qty", NUMBER), ("Rejected Qty", NUMBER), ("Entries", INTEGER)],
+        "key": "Rollup Key",
+        "indexes": ["Date"],
+        "derived": True,
+    },
+    "Vendor Quality": {
+        "columns": [("PO Number", TEXT), ("Received Qty", NUMBER), ("Accepted Qty", NUMBER), ("Rejected Qty", NUMBER),
+                    ("GRNs", INTEGER)],
+        "key": "PO Number",
+        "indexes": [],
+        "derived": True,
+    },
+    "Receivables": {
+        "columns": [("Rollup Key", TEXT), ("Customer", TEXT), ("Due Date", DATE), ("Pending", NUMBER),
+                    ("Invoices", INTEGER)],
+        "key": "Rollup Key",
+        "indexes": ["Due Date"],
+        "derived": True,
+    },
+    # Last source row id each rollup has applied
+    "Rollup State": {
+        "columns": [("Source", TEXT), ("Last Id", INTEGER), ("Rows", INTEGER)],
+        "key": "Source",
+        "indexes": [],
+        "derived": True,
+    },
+}
+
+# Sheets of the workbook: everything but the derived tables
+SHEETS = [title for title, spec in ERP_SCHEMA.items() if not spec.get("derived")]
+
+
+def sheet_headers(title):
+    return [name for name, _ in ERP_SCHEMA[title]["columns"]]
+
+
+def export_erp_workbook(file_name, sheet_rows=None, dashboard_rows=None):
+    # Streams the ERP workbook to disk with openpyxl's write-only mode, so
+    # memory stays flat however many rows the sheets hold. `sheet_rows` maps
+    # a sheet title to an iterable (typically a generator) of row dicts keyed
+    # by header, or of plain lists in header order; missing titles are
+    # written header-only. `dashboard_rows` (lists) go under the Dashboard
+    # title.
+    from openpyxl import Workbook  # imported on use: the schema alone is needed far more often
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment
+    from openpyxl.utils import get_column_letter
 
-    wb = Workbook()
+    sheet_rows = sheet_rows or {}
 
-    # Remove default sheet
-    default_sheet = wb.active
-    wb.remove(default_sheet)
+    wb = Workbook(write_only=True)
 
     header_font = Font(bold=True)
     center_align = Alignment(horizontal="center")
 
-    def add_sheet(title, headers):
-        ws = wb.create_sheet(title)
-
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.alignment = center_align
-            ws.column_dimensions[chr(64 + col)].width = 22
+    def header_cell(ws, value):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = header_font
+        cell.alignment = center_align
+        return cell
 
     # Dashboard
     ws = wb.create_sheet("Dashboard")
-    ws["A1"] = "FACTORY ERP SYSTEM"
-    ws["A1"].font = Font(size=16, bold=True)
+    title_cell = WriteOnlyCell(ws, value="FACTORY ERP SYSTEM")
+    title_cell.font = Font(size=16, bold=True)
+    ws.append([title_cell])
+    for row in dashboard_rows or ():
+        ws.append(row)
 
-    # Masters
-    add_sheet("Customer Master",
-              ["Customer ID","Customer Name","Contact","Email","Address","GST","Payment Terms"])
+    counts = {}
+    for title in SHEETS:
+        headers = sheet_headers(title)
+        ws = wb.create_sheet(title)
+        for col in range(1, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 22
+        ws.append([header_cell(ws, h) for h in headers])
 
-    add_sheet("Vendor Master",
-              ["Vendor ID","Vendor Name","Material Supplied","Phone","GST","Lead Time"])
+        count = 0
+        for row in sheet_rows.get(title, ()):
+            if isinstance(row, dict):
+                row = [row.get(h) for h in headers]
+            ws.append(row)
+            count += 1
+        counts[title] = count
 
-    add_sheet("Item Master",
-              ["Item Code","Item Name","Category","Unit","Standard Cost","Min Stock"])
+    wb.save(file_name)
+    return counts
 
-    # BOM
-    add_sheet("BOM",
-              ["Product Code","Raw Material Code","Quantity Required","Unit"])
 
-    # Purchase
-    add_sheet("Purchase Orders",
-              ["PO Number","Date","Vendor","Item","Quantity","Rate","Expected Delivery","Status"])
+def create_erp_file(file_name=FILE_NAME, store=None):
+    # Without a store this is the empty template; with one (see erp_store.py)
+    # every sheet is streamed from the store, which is the system of record
+    # -- the workbook is an export only -- and the Dashboard sheet shows the
+    # store's rollups.
+    sheet_rows = {}
+    dashboard_rows = None
+    if store is not None:
+        from erp_dashboard import DashboardRollups
 
-    add_sheet("GRN",
-              ["GRN Number","Date","PO Number","Item","Received Qty","Accepted Qty","Rejected Qty"])
+        sheet_rows = {title: store.iter_rows(title) for title in SHEETS}
+        dashboard_rows = DashboardRollups(store).sheet_rows()
+    return export_erp_workbook(file_name, sheet_rows, dashboard_rows)
 
-    # Production
-    add_sheet("Production Plan",
-              ["Plan Number","Date","Product","Planned Qty","Start Date","End Date","Status"])
 
-    add_sheet("Job Cards",
-              ["Job Card No","Plan Number","Product","Quantity","Machine","Operator","Start Time","End Time","Status"])
+def _iter_ws_rows(ws, title):
+    rows = ws.iter_rows(values_only=True)
+    header_row = next(rows, None)
+    if header_row is None:
+        return
+    known = set(sheet_headers(title))
+    positions = [(i, h) for i, h in enumerate(header_row) if h in known]
+    for values in rows:
+        row = {h: values[i] for i, h in positions if i < len(values)}
+        if any(v is not None and v != "" for v in row.values()):
+            yield row
 
-    add_sheet("Production Entry",
-              ["Date","Job Card No","Product","Produced Qty","Rejected Qty","Shift"])
 
-    # Inventory
-    add_sheet("Raw Material Inventory",
-              ["Item Code","Opening Stock","Received","Issued","Balance"])
+def iter_sheet_rows(file_name, title):
+    # Read-only, row-at-a-time reader for one sheet of a (legacy) workbook.
+    # Yields dicts keyed by the schema headers found in the sheet's first
+    # row; unknown columns and fully blank rows are skipped.
+    from openpyxl import load_workbook
 
-    add_sheet("Finished Goods Inventory",
-              ["Product","Opening Stock","Produced","Dispatched","Balance"])
+    wb = load_workbook(file_name, read_only=True, data_only=True)
+    try:
+        if title in wb.sheetnames:
+            yield from _iter_ws_rows(wb[title], title)
+    finally:
+        wb.close()
+
+
+def import_erp_workbook(file_name, store, batch_size=1000, progress=None):
+    # Loads every schema sheet of `file_name` into `store` in bounded memory.
+    # Returns {title: (rows, seconds)}; `progress(title, rows, seconds)` is
+    # called after each sheet.
+    from openpyxl import load_workbook
+
+    report = {}
+    wb = load_workbook(file_name, read_only=True, data_only=True)
+    try:
+        for title in SHEETS:
+            if title not in wb.sheetnames:
+                continue
+            start = time.perf_counter()
+            count = store.insert_many(title, _iter_ws_rows(wb[title], title), batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            report[title] = (count, elapsed)
+            if progress is not None:
+                progress(title, count, elapsed)
+    finally:
+        wb.close()
+    if {"Raw Material Inventory", "Finished Goods Inventory"} & set(report):
+        # Imported balances have no ledger history yet; record them as
+        # opening stock so the stock ledger (erp_inventory.py) can take over
+        from erp_inventory import StockLedger
+
+        StockLedger(store).seed_openings()
+    return report
+
+
+def ensure_erp_exists(file_name=FILE_NAME):
+    if not os.path.exists(file_name):
+        create_erp_file(file_name)
+
+
+def _print_rate(title, rows, seconds):
+    rate = rows / seconds if seconds > 0 else 0.0
+    print(f"{title:<26} {rows:>9} rows  {seconds:7.2f}s  {rate:>10.0f} rows/sec")
 
-    # Sales
-    add_sheet("Sales Orders",
-              ["SO Number","Customer","Product","Quantity","Delivery Date","Status"])
 
-    add_sheet("Dispatch",
-              ["Dispatch No","SO Number","Product","Quantity","Dispatch Date","Transport","Invoice No"])
+def main(argv=None):
+    from erp_store import open_store
 
-    add_sheet("Invoices",
-              ["Invoice No","Customer","Amount","Paid","Pending","Due Date"])
+    parser = argparse.ArgumentParser(description="Export/import the Factory ERP workbook")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("--file", default=FILE_NAME, help="workbook path (default: %(default)s)")
+    parser.add_argument("--store", default="sqlite:///factory_erp.db", help="ERP store URL (default: %(default)s)")
+    args = parser.parse_args(argv)
 
-    wb.save(FILE_NAME)
+    store = open_store(args.store)
+    try:
+        start = time.perf_counter()
+        if args.action == "export":
+            counts = create_erp_file(args.file, store)
+            total = sum(counts.values())
+        else:
+            report = import_erp_workbook(args.file, store, progress=_print_rate)
+            total = sum(rows for rows, _ in report.values())
+        _print_rate("Total", total, time.perf_counter() - start)
+    finally:
+        store.close()
+    return 0
 
 
-def ensure_erp_exists():
-    if not os.path.exists(FILE_NAME):
-        create_erp_file()
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import time
+import zipfile
+import argparse
+from functools import lru_cache, partial
+from multiprocessing import Pool
+
+from jobcard_pdf import render_jobcard
+
+# -------------------------------------------------------
+# Batch job-card rendering
+#
+#   python batch_jobcards.py cards.jsonl --zip jobcards.zip --workers 8
+#   python batch_jobcards.py cards.json --out-dir pdfs/
+#
+# Input is a JSON list or JSON-lines file of job-card records with the
+# same fields as the Streamlit form (see jobcard_pdf.render_jobcard).
+# A record may carry "logo_path"; each worker reads a given logo once.
+# -------------------------------------------------------
+
+
+def load_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def jobcard_file_name(record, index):
+    job_no = str(record.get("job_no") or f"card{index:06d}")
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in job_no)
+    return f"JobCard_{safe}.pdf"
+
+
+@lru_cache(maxsize=32)
+def _read_logo(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _named_tasks(records):
+    # (index, file name, record), with names made unique across the batch:
+    # job numbers that clean up to the same text (or repeat) get the record
+    # index appended instead of overwriting each other
+    used = set()
+    for index, record in enumerate(records):
+        name = base = jobcard_file_name(record, index)
+        suffix = str(index)
+        while name.casefold() in used:
+            name = f"{base[:-len('.pdf')]}_{suffix}.pdf"
+            suffix += "_"
+        used.add(name.casefold())
+        yield index, name, record
+
+
+def _render_task(task, out_dir=None):
+    # With `out_dir` the worker writes the PDF file itself and hands back
+    # only its size; otherwise the PDF bytes go back to the parent. A card
+    # that fails comes back as (index, name, None, error) so the rest of
+    # the batch carries on.
+    index, name, record = task
+    path = None
+    try:
+        logo_path = record.get("logo_path")
+        logo = _read_logo(logo_path) if logo_path else None
+        if out_dir is None:
+            return index, name, render_jobcard(record, logo), None
+        path = os.path.join(out_dir, name)
+        with open(path, "wb") as f:
+            render_jobcard(record, logo, output=f)
+        return index, name, os.path.getsize(path), None
+    except Exception as exc:
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+        return index, name, None, f"{type(exc).__name__}: {exc}"
+
+
+def _iter_rendered(records, workers, chunksize, out_dir=None):
+    tasks = _named_tasks(records)
+    task = partial(_render_task, out_dir=out_dir)
+    if workers == 1:
+        # Keep single-worker runs in-process (easier to debug and profile)
+        yield from map(task, tasks)
+        return
+    with Pool(processes=workers) as pool:
+        # imap_unordered consumes `records` lazily and hands back each PDF as
+        # soon as it is done, so only in-flight cards are held in memory
+        yield from pool.imap_unordered(task, tasks, chunksize=chunksize)
+
+
+def render_batch(records, zip_path=None, out_dir=None, workers=None, chunksize=4, progress=None):
+    # Renders every record and streams the PDFs into `zip_path` or `out_dir`.
+    # Returns a stats dict with counts, bytes written and throughput; cards
+    # that failed are listed in "failures" as (index, file name, error).
+    if (zip_path is None) == (out_dir is None):
+        raise ValueError("Pass exactly one of zip_path or out_dir")
+    workers = workers or os.cpu_count() or 1
+
+    archive = None
+    if zip_path is not None:
+        # PDFs are already compressed; storing avoids burning CPU in the parent
+        archive = zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED)
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+
+    count = 0
+    total_bytes = 0
+    failures = []
+    start = time.perf_counter()
+    try:
+        for index, name, result, error in _iter_rendered(records, workers, chunksize, out_dir):
+            if error is not None:
+                failures.append((index, name, error))
+                continue
+            if archive is not None:
+                archive.writestr(name, result)
+                size = len(result)
+            else:
+                size = result
+            count += 1
+            total_bytes += size
+            if progress is not None:
+                progress(count, time.perf_counter() - start)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "cards": count,
+        "failed": len(failures),
+        "failures": sorted(failures),
+        "bytes": total_bytes,
+        "seconds": elapsed,
+        "cards_per_sec": count / elapsed if elapsed > 0 else 0.0,
+        "workers": workers,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render vendor job-card PDFs in bulk")
+    parser.add_argument("records", help="JSON list or .jsonl file of job-card records")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--zip", dest="zip_path", help="write all PDFs into this ZIP file")
+    target.add_argument("--out-dir", help="write one PDF per card into this directory")
+    parser.add_argument("--workers", type=int, default=None, help="process count (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=4, help="cards handed to a worker at a time")
+    args = parser.parse_args(argv)
+
+    def progress(count, elapsed):
+        if count % 100 == 0:
+            print(f"{count} cards, {count / elapsed:.1f} cards/sec", file=sys.stderr)
+
+    stats = render_batch(load_records(args.records), zip_path=args.zip_path, out_dir=args.out_dir,
+                         workers=args.workers, chunksize=args.chunksize, progress=progress)
+    print(f"Rendered {stats['cards']} job cards ({stats['bytes'] / 1e6:.1f} MB) "
+          f"in {stats['seconds']:.2f}s: {stats['cards_per_sec']:.1f} cards/sec "
+          f"on {stats['workers']} workers")
+    for index, name, error in stats["failures"]:
+        print(f"record {index} ({name}) failed: {error}", file=sys.stderr)
+    if stats["failed"]:
+        print(f"{stats['failed']} job cards failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
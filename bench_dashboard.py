@@ -0,0 +1,94 @@
+import sys
+import time
+import random
+import argparse
+from datetime import date, timedelta
+
+from erp_store import open_store
+from erp_dashboard import DashboardRollups
+
+# -------------------------------------------------------
+# Dashboard rollup benchmark
+#
+#   python bench_dashboard.py                # 3 years, 200 entries a day
+#   python bench_dashboard.py --years 5 --per-day 500
+#
+# Fills an in-memory store with years of production entries, GRNs and
+# invoices, then reports the one-off initial rollup, the cost of loading
+# the dashboard, and of catching up on one more day of entries.
+# -------------------------------------------------------
+
+SHIFTS = ["A", "B", "C"]
+
+
+def fill_day(store, rng, day, per_day, machines, state):
+    entries = []
+    for _ in range(per_day):
+        job = f"JC{rng.randrange(state['jobs']):06d}"
+        entries.append({"Date": day, "Job Card No": job, "Product": "P1", "Shift": rng.choice(SHIFTS),
+                        "Produced Qty": rng.randint(50, 500), "Rejected Qty": rng.randint(0, 20)})
+    store.insert_many("Production Entry", entries)
+    store.insert_many("GRN", ({
+        "GRN Number": f"GRN{state['grn'] + i:07d}", "Date": day, "PO Number": f"PO{rng.randrange(500):05d}",
+        "Item": "RM1", "Received Qty": 100, "Rejected Qty": rng.randint(0, 10),
+    } for i in range(per_day // 20)))
+    state["grn"] += per_day // 20
+    store.insert_many("Invoices", ({
+        "Invoice No": f"INV{state['inv'] + i:07d}", "Customer": f"C{rng.randrange(200):03d}",
+        "Amount": 1000, "Paid": rng.choice([0, 0, 500, 1000]), "Due Date": day + timedelta(days=30),
+    } for i in range(per_day // 20)))
+    state["inv"] += per_day // 20
+
+
+def make_store(years, per_day, machines, seed=7):
+    rng = random.Random(seed)
+    store = open_store("sqlite:///:memory:")
+    jobs = 5000
+    store.insert_many("Job Cards", ({
+        "Job Card No": f"JC{i:06d}", "Machine": f"M{rng.randrange(machines):03d}",
+        "Operator": f"OP{rng.randrange(machines * 2):03d}", "Status": "Open",
+    } for i in range(jobs)))
+    store.insert_many("Purchase Orders", ({"PO Number": f"PO{i:05d}", "Vendor": f"V{i % 60:03d}"}
+                                          for i in range(500)))
+    state = {"jobs": jobs, "grn": 0, "inv": 0}
+    start = date.today() - timedelta(days=365 * years)
+    for d in range(365 * years):
+        fill_day(store, rng, start + timedelta(days=d), per_day, machines, state)
+    return store, rng, state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard rollups")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-day", type=int, default=200, help="production entries per day")
+    parser.add_argument("--machines", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    store, rng, state = make_store(args.years, args.per_day, args.machines)
+    print(f"{store.count('Production Entry')} production entries, {store.count('GRN')} GRNs, "
+          f"{store.count('Invoices')} invoices")
+    rollups = DashboardRollups(store)
+
+    start = time.perf_counter()
+    rollups.refresh()
+    print(f"initial rollup:      {time.perf_counter() - start:8.3f}s")
+
+    start = time.perf_counter()
+    tables = rollups.dashboard()
+    sizes = ", ".join(f"{title} {len(rows)}" for title, rows in tables.items())
+    print(f"dashboard load:      {time.perf_counter() - start:8.3f}s ({sizes} rows)")
+
+    fill_day(store, rng, date.today(), args.per_day, args.machines, state)
+    start = time.perf_counter()
+    applied = rollups.refresh()
+    print(f"refresh after 1 day: {time.perf_counter() - start:8.3f}s {applied}")
+
+    start = time.perf_counter()
+    rollups.dashboard()
+    print(f"dashboard reload:    {time.perf_counter() - start:8.3f}s")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
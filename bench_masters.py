@@ -0,0 +1,73 @@
+import sys
+import time
+import random
+import argparse
+
+from erp_store import open_store
+from erp_masters import open_master_data
+
+# -------------------------------------------------------
+# Master-data lookup benchmark
+#
+#   python bench_masters.py                 # 100k items, 5k vendors
+#   python bench_masters.py --items 500000
+#
+# Reports index build time, per-lookup latency for prefix and "contains"
+# queries, and the cost of refresh() after appending master rows.
+# -------------------------------------------------------
+
+WORDS = ["steel", "shaft", "bolt", "flange", "bush", "gear", "pin", "collar", "sleeve", "plate",
+         "nut", "washer", "spacer", "housing", "cover", "bracket"]
+GRADES = ["EN8", "EN19", "SS304", "SS316", "Brass", "MS"]
+
+
+def make_store(items, vendors, seed=7):
+    rng = random.Random(seed)
+    store = open_store("sqlite:///:memory:")
+    store.insert_many("Item Master", ({
+        "Item Code": f"IT{i:06d}",
+        "Item Name": " ".join(rng.choice(WORDS) for _ in range(3)) + f" {i}",
+        "Category": rng.choice(GRADES), "Unit": "Nos",
+    } for i in range(items)))
+    store.insert_many("Vendor Master", ({
+        "Vendor ID": f"V{i:05d}", "Vendor Name": f"{rng.choice(WORDS).title()} Works {i}",
+        "Phone": f"98{i:08d}", "GST": f"27AAAC{i:05d}Z",
+    } for i in range(vendors)))
+    return store
+
+
+def time_lookups(masters, name, query, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        matches = masters.search(name, query, limit=8)
+    return (time.perf_counter() - start) / repeat, len(matches)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark master-data autocomplete")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--vendors", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    store = make_store(args.items, args.vendors)
+    start = time.perf_counter()
+    masters = open_master_data(store)
+    print(f"build: {time.perf_counter() - start:.2f}s ({args.items} items, {args.vendors} vendors)")
+
+    queries = [("item", "IT0123"), ("item", "it05"), ("item", "flange"), ("item", "ange bo"),
+               ("item", "12345"), ("item", "no such thing"), ("vendor", "gear wo"), ("vendor", "V0004")]
+    for name, query in queries:
+        seconds, found = time_lookups(masters, name, query, args.repeat)
+        print(f"{name:<7} {query!r:<16} {seconds * 1e6:8.1f} us  {found} match(es)")
+
+    store.insert_many("Item Master", ({"Item Code": f"NEW{i:04d}", "Item Name": f"new part {i}"}
+                                      for i in range(100)))
+    start = time.perf_counter()
+    applied = masters.refresh()
+    print(f"refresh after 100 new items: {(time.perf_counter() - start) * 1e3:.1f} ms {applied}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
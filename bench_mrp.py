@@ -0,0 +1,106 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from erp_mrp import run_mrp, flatten_bom
+
+# -------------------------------------------------------
+# MRP benchmark on synthetic data
+#
+#   python bench_mrp.py                      # 50k BOM lines x 5k plans
+#   python bench_mrp.py --bom-lines 200000 --plans 20000
+#
+# Two-level BOM: finished products -> sub-assemblies and raw materials,
+# sub-assemblies -> raw materials.
+# -------------------------------------------------------
+
+
+def make_data(bom_lines, plans, raw_materials=10000, seed=7):
+    rng = np.random.default_rng(seed)
+    products = max(bom_lines // 25, 1)
+    subassemblies = max(bom_lines // 17, 1)
+    top_lines = bom_lines * 2 // 5
+    sub_lines = bom_lines - top_lines
+
+    rm_codes = np.array([f"RM{i:06d}" for i in range(raw_materials)])
+    sa_codes = np.array([f"SA{i:06d}" for i in range(subassemblies)])
+    fg_codes = np.array([f"FG{i:06d}" for i in range(products)])
+
+    top_children = np.where(rng.random(top_lines) < 0.3,
+                            sa_codes[rng.integers(0, subassemblies, top_lines)],
+                            rm_codes[rng.integers(0, raw_materials, top_lines)])
+    bom = pd.DataFrame({
+        "Product Code": np.concatenate([fg_codes[rng.integers(0, products, top_lines)],
+                                        sa_codes[rng.integers(0, subassemblies, sub_lines)]]),
+        "Raw Material Code": np.concatenate([top_children, rm_codes[rng.integers(0, raw_materials, sub_lines)]]),
+        "Quantity Required": rng.uniform(0.1, 5.0, bom_lines).round(3),
+        "Unit": "Nos",
+    })
+
+    start = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 90, plans), unit="D")
+    plan = pd.DataFrame({
+        "Plan Number": [f"PL{i:06d}" for i in range(plans)],
+        "Date": start,
+        "Product": fg_codes[rng.integers(0, products, plans)],
+        "Planned Qty": rng.integers(10, 1000, plans).astype(float),
+        "Start Date": start,
+        "End Date": start + pd.Timedelta(days=7),
+        "Status": rng.choice(["Open", "Released", "Completed"], plans, p=[0.6, 0.3, 0.1]),
+    })
+
+    inventory = pd.DataFrame({
+        "Item Code": rm_codes, "Opening Stock": 0.0, "Received": 0.0, "Issued": 0.0,
+        "Balance": rng.integers(0, 50000, raw_materials).astype(float),
+    })
+
+    po_count = raw_materials * 2
+    pos = pd.DataFrame({
+        "PO Number": [f"PO{i:07d}" for i in range(po_count)],
+        "Date": pd.Timestamp("2024-12-01"),
+        "Vendor": "V001",
+        "Item": rm_codes[rng.integers(0, raw_materials, po_count)],
+        "Quantity": rng.integers(100, 5000, po_count).astype(float),
+        "Rate": 10.0,
+        "Expected Delivery": pd.Timestamp("2025-01-15"),
+        "Status": rng.choice(["Open", "Received"], po_count, p=[0.7, 0.3]),
+    })
+    grn = pd.DataFrame({
+        "GRN Number": [f"GRN{i:07d}" for i in range(po_count // 2)],
+        "PO Number": pos["PO Number"].to_numpy()[rng.integers(0, po_count, po_count // 2)],
+        "Received Qty": rng.integers(0, 500, po_count // 2).astype(float),
+    })
+    return bom, plan, inventory, pos, grn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MRP engine")
+    parser.add_argument("--bom-lines", type=int, default=50000)
+    parser.add_argument("--plans", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    bom, plan, inventory, pos, grn = make_data(args.bom_lines, args.plans)
+    print(f"BOM lines: {len(bom)}, plans: {len(plan)}, POs: {len(pos)}, GRNs: {len(grn)}")
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = run_mrp(bom, plan, inventory, pos, grn=grn)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    flat = flatten_bom(bom)
+    flatten_time = time.perf_counter() - start
+
+    print(f"flatten_bom: {flatten_time:.3f}s ({len(flat)} product/material pairs)")
+    print(f"run_mrp:     best {min(timings):.3f}s, worst {max(timings):.3f}s over {args.repeat} runs")
+    print(f"requirements: {len(result.requirements)}, shortages: {len(result.shortages)}, "
+          f"suggested POs: {len(result.suggested_pos)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
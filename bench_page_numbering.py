@@ -0,0 +1,113 @@
+import sys
+import time
+import argparse
+import tracemalloc
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen.canvas import Canvas
+
+from jobcard_pdf import NumberedCanvas
+
+# -------------------------------------------------------
+# "Page X of Y" benchmark
+#
+#   python bench_page_numbering.py                  # 500 pages
+#   python bench_page_numbering.py --pages 2000 --repeat 3
+#
+# Compares NumberedCanvas (deferred page-number forms) with the canvas it
+# replaced, with the usual ReportLab recipe that snapshots every page's
+# state until save(), and with a plain Canvas that prints no page numbers
+# (the floor: ReportLab itself keeps every finished page until save()).
+# Pages carry a job-card-sized grid of text so the snapshots are realistic.
+# -------------------------------------------------------
+
+
+class PreviousNumberedCanvas(Canvas):
+    # jobcard_pdf.NumberedCanvas before the deferred forms. showPage both
+    # snapshotted and emitted the page, so every page came out twice.
+    def __init__(self, *args, **kwargs):
+        Canvas.__init__(self, *args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        Canvas.showPage(self)
+
+    def save(self):
+        num_pages = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            self.setFont("Helvetica", 9)
+            self.drawCentredString(300, 20, f"Page {self._pageNumber} of {num_pages}")
+            Canvas.showPage(self)
+        Canvas.save(self)
+
+
+class SnapshotNumberedCanvas(Canvas):
+    # The usual recipe: keep each page's state, emit them all in save()
+    def __init__(self, *args, **kwargs):
+        Canvas.__init__(self, *args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        num_pages = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            self.setFont("Helvetica", 9)
+            self.drawCentredString(300, 20, f"Page {self._pageNumber} of {num_pages}")
+            Canvas.showPage(self)
+        Canvas.save(self)
+
+
+def draw_pages(canvas, pages, rows=40, cols=6):
+    for page in range(pages):
+        canvas.setFont("Helvetica", 8)
+        for r in range(rows):
+            y = 800 - r * 18
+            for c in range(cols):
+                canvas.drawString(40 + c * 90, y, f"P{page} R{r} C{c}")
+            canvas.line(36, y - 4, 560, y - 4)
+        canvas.showPage()
+    canvas.save()
+
+
+def bench(canvas_class, pages, repeat):
+    timings = []
+    for _ in range(repeat):
+        buffer = BytesIO()
+        start = time.perf_counter()
+        draw_pages(canvas_class(buffer, pagesize=A4), pages)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    buffer = BytesIO()
+    draw_pages(canvas_class(buffer, pagesize=A4), pages)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 1e6, len(buffer.getvalue())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark page-number stamping")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'canvas':<24} {'pages':>6} {'best s':>8} {'pages/s':>8} {'peak MB':>8} {'bytes':>10}")
+    for name, canvas_class in [("previous (pages twice)", PreviousNumberedCanvas),
+                               ("snapshot recipe", SnapshotNumberedCanvas),
+                               ("deferred forms", NumberedCanvas),
+                               ("no page numbers", Canvas)]:
+        seconds, peak_mb, size = bench(canvas_class, args.pages, args.repeat)
+        print(f"{name:<24} {args.pages:>6} {seconds:>8.3f} {args.pages / seconds:>8.0f} "
+              f"{peak_mb:>8.1f} {size:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
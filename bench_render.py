@@ -0,0 +1,121 @@
+import re
+import sys
+import time
+import argparse
+import tracemalloc
+from io import BytesIO
+from collections import defaultdict
+
+from PIL import Image as PILImage
+
+from jobcard_pdf import (
+    ITEM_COLUMNS, MATERIAL_COLUMNS, GRN_COLUMNS,
+    rows_to_df, jobcard_qr_text, generate_jobcard_pdf
+)
+
+# -------------------------------------------------------
+# Job-card rendering benchmark
+#
+#   python bench_render.py                         # 1..5000 rows, with/without logo
+#   python bench_render.py --sizes 1,100 --repeat 20 --no-logo
+#
+# For each synthetic card size (rows per item/material/GRN table) reports
+# p50/p95 latency of generate_jobcard_pdf, peak traced memory of one
+# render, pages/sec, and the mean time per render stage.
+# -------------------------------------------------------
+
+STAGES = ["context", "codes", "story", "layout", "page_numbering", "write"]
+_PAGE_RE = re.compile(rb"/Type /Page\b(?!s)")
+
+
+def make_logo(size=240):
+    img = PILImage.new("RGB", (size, size), "#0A284B")
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def make_card(rows, logo=None):
+    items = [[f"Shaft {i}", f"DRG-{i:05d}", f"https://plm/drg/{i}", "EN8", i % 50 + 1, "Nos"]
+             for i in range(rows)]
+    materials = [[f"EN8 Bar {i}", f"H{i:06d}", "32 mm", round(i * 0.37, 2), i % 10 + 1, "OK"]
+                 for i in range(rows)]
+    grn = [[f"2025-01-{i % 28 + 1:02d}", 100, 98, 2, "Minor burr", "QC-1"] for i in range(rows)]
+    job_no, job_date, dispatch, vendor_id = "JC-BENCH", "2025-01-01", "Plant 2", "V-001"
+    return dict(
+        company_name="Bench Engineering Pvt Ltd", company_address="Plot 1, Industrial Area",
+        logo_file=logo, vendor_id=vendor_id, vendor_company="Vendor Works",
+        vendor_person="R. Kumar", vendor_mobile="9800000000", vendor_gst="27ABCDE1234F1Z5",
+        vendor_address="Unit 4, MIDC", job_no=job_no, job_date=job_date, dispatch_location=dispatch,
+        qr_bytes=None,
+        items_df=rows_to_df(items, ITEM_COLUMNS),
+        materials_df=rows_to_df(materials, MATERIAL_COLUMNS),
+        grn_df=rows_to_df(grn, GRN_COLUMNS),
+        tolerance="±0.05", surface_finish="Ra 1.6", hardness="HRC 40-45", thread_check=True,
+        qr_text=jobcard_qr_text(job_no, job_date, dispatch, vendor_id),
+    )
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def bench_case(card, repeat):
+    stage_totals = defaultdict(float)
+
+    def on_stage(name, seconds):
+        stage_totals[name] += seconds
+
+    # Warm-up: fills the render-context/QR caches like a long-running server
+    pdf = generate_jobcard_pdf(**card)
+    pages = len(_PAGE_RE.findall(pdf))
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generate_jobcard_pdf(**card, on_stage=on_stage)
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    generate_jobcard_pdf(**card)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pages": pages,
+        "bytes": len(pdf),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "pages_per_sec": pages * repeat / sum(latencies),
+        "peak_mb": peak / 1e6,
+        "stages": {name: stage_totals[name] / repeat for name in STAGES},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark job-card PDF rendering")
+    parser.add_argument("--sizes", default="1,10,100,1000,5000",
+                        help="comma-separated rows per table (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="timed renders per case; cases over 1000 rows use a fifth of this")
+    parser.add_argument("--no-logo", action="store_true", help="skip the with-logo cases")
+    args = parser.parse_args(argv)
+
+    logos = [("no", None)] if args.no_logo else [("no", None), ("yes", make_logo())]
+    print(f"{'rows':>6} {'logo':>4} {'pages':>5} {'p50 ms':>9} {'p95 ms':>9} {'pages/s':>8} {'peak MB':>8}  "
+          + " ".join(f"{s:>14}" for s in STAGES))
+    for rows in [int(x) for x in args.sizes.split(",")]:
+        repeat = args.repeat if rows <= 1000 else max(args.repeat // 5, 1)
+        for logo_label, logo in logos:
+            r = bench_case(make_card(rows, logo), repeat)
+            print(f"{rows:>6} {logo_label:>4} {r['pages']:>5} {r['p50'] * 1e3:>9.1f} {r['p95'] * 1e3:>9.1f} "
+                  f"{r['pages_per_sec']:>8.1f} {r['peak_mb']:>8.1f}  "
+                  + " ".join(f"{r['stages'][s] * 1e3:>11.1f} ms" for s in STAGES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
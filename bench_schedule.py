@@ -0,0 +1,62 @@
+import sys
+import time
+import random
+import argparse
+from datetime import date, datetime, timedelta
+
+from erp_schedule import schedule_jobs
+
+# -------------------------------------------------------
+# Scheduler benchmark on synthetic data
+#
+#   python bench_schedule.py                      # 10k jobs x 200 machines
+#   python bench_schedule.py --jobs 50000 --machines 500
+#
+# Jobs go through four operations; each machine does one or two of them
+# with its own cycle time.
+# -------------------------------------------------------
+
+ROUTE = ["Cutting", "Turning (Traub/CNC)", "Milling", "Deburring"]
+
+
+def make_data(jobs, machines, seed=7):
+    rng = random.Random(seed)
+    today = date.today()
+    plans = [{
+        "Plan Number": f"PP{j:06d}", "Product": f"FG{rng.randrange(500):04d}",
+        "Planned Qty": rng.randint(50, 2000), "Status": "Open",
+        "Start Date": today + timedelta(days=rng.randrange(10)),
+        "End Date": today + timedelta(days=rng.randrange(10, 60)),
+    } for j in range(jobs)]
+    fleet = []
+    for i in range(machines):
+        ops = rng.sample(ROUTE, rng.choice([1, 2]))
+        fleet.append({"Machine": f"M{i:03d}", "Cycle Time": {op: rng.uniform(5, 60) for op in ops}})
+    for op in ROUTE:  # at least one machine per operation
+        fleet[ROUTE.index(op)]["Cycle Time"].setdefault(op, 30.0)
+    return plans, fleet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the job-card scheduler")
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--machines", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    plans, fleet = make_data(args.jobs, args.machines)
+    start = time.perf_counter()
+    schedule = schedule_jobs(plans, ROUTE, fleet, start=datetime.combine(date.today(), datetime.min.time()))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.jobs} jobs x {len(ROUTE)} operations on {args.machines} machines: {elapsed:.2f}s "
+          f"({len(schedule.assignments)} job cards)")
+    print(f"makespan:    {schedule.makespan}")
+    print(f"utilisation: {schedule.utilisation:.1%}")
+    ranked = sorted(schedule.machine_utilisation.items(), key=lambda kv: kv[1])
+    print(f"least used:  {', '.join(f'{m} {u:.0%}' for m, u in ranked[:3])}")
+    print(f"most used:   {', '.join(f'{m} {u:.0%}' for m, u in ranked[-3:])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import sys
+import json
+import argparse
+import subprocess
+
+# -------------------------------------------------------
+# Cold-start benchmark
+#
+#   python bench_startup.py               # 5 fresh interpreters per probe
+#   python bench_startup.py --repeat 10
+#
+# Every probe runs in a new interpreter so nothing is already imported:
+#   import   - `import streamlit_job_card_app`, outside a Streamlit run
+#   first run - the first script run of the app under AppTest (what a
+#               user waits for before the form shows)
+#   export   - that run plus rendering one PDF
+# and lists which heavy libraries each probe ended up loading.
+# -------------------------------------------------------
+
+HEAVY = ["reportlab", "qrcode", "PIL", "pandas", "numpy", "openpyxl"]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+%s
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in %r if m in sys.modules]]))
+"""
+
+PROBES = {
+    "import": "import streamlit_job_card_app",
+    "first run": (
+        "from streamlit.testing.v1 import AppTest\n"
+        "AppTest.from_file('streamlit_job_card_app.py', default_timeout=60).run()"
+    ),
+    "export": (
+        "from streamlit.testing.v1 import AppTest\n"
+        "AppTest.from_file('streamlit_job_card_app.py', default_timeout=60).run()\n"
+        "import streamlit_job_card_app as app\n"
+        "app.build_pdf({f: '' for f in app.PDF_FIELDS + ['thread_check']}, None,"
+        " app.get_repository(), 'JobNo: bench')"
+    ),
+}
+
+
+def run_probe(code):
+    out = subprocess.run([sys.executable, "-c", _PROBE % (code, HEAVY)],
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the form's cold start")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'probe':<10} {'best':>9} {'median':>9}  heavy modules loaded")
+    for name, code in PROBES.items():
+        runs = [run_probe(code) for _ in range(args.repeat)]
+        times = sorted(t for t, _ in runs)
+        loaded = ", ".join(runs[-1][1]) or "-"
+        print(f"{name:<10} {times[0]:>8.2f}s {times[len(times) // 2]:>8.2f}s  {loaded}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
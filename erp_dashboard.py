@@ -0,0 +1,352 @@
+import sys
+import time
+import argparse
+from collections import defaultdict
+from itertools import islice
+from datetime import date, timedelta
+
+from erp_store import open_store
+
+# -------------------------------------------------------
+# Production dashboard over precomputed rollups
+#
+#   rollups = DashboardRollups(store)
+#   rollups.refresh()                       # applies new rows only
+#   rollups.daily_production(since=date(2026, 10, 1))
+#   rollups.vendor_rejection()
+#   rollups.receivables_ageing()
+#
+# The dashboard figures live in derived store tables (see ERP_SCHEMA) that
+# are kept current by folding in only the rows appended to their source
+# since the last refresh -- ERPStore.iter_new_rows past the id recorded in
+# "Rollup State":
+#   Production Entry -> Daily Production (date, shift, job card)
+#   GRN              -> Vendor Quality   (purchase order)
+#   Invoices         -> Receivables      (customer, due date)
+# Reading the dashboard is a query over the rollups, however many years of
+# entries are behind them. Whatever can change after the entry is joined
+# when reading: machine and operator come from the Job Card as it is now
+# (so rescheduling or reassigning a card moves its output too), the vendor
+# from the Purchase Order (a GRN booked before its PO shows up once the PO
+# does), and ageing buckets depend on today. A source that lost rows is rebuilt from scratch;
+# invoices paid in place must go through save_invoice() to show.
+# -------------------------------------------------------
+
+UNASSIGNED = "Unassigned"
+
+# source entity -> rollup entity
+ROLLUPS = {
+    "Production Entry": "Daily Production",
+    "GRN": "Vendor Quality",
+    "Invoices": "Receivables",
+}
+
+# (days overdue up to, label); None is open-ended
+AGEING_BUCKETS = [(0, "Not due"), (30, "1-30 days"), (60, "31-60 days"), (90, "61-90 days"),
+                  (None, "90+ days")]
+
+
+def _qty(value):
+    return float(value or 0)
+
+
+def _label(value):
+    text = "" if value is None else str(value).strip()
+    return text or UNASSIGNED
+
+
+def rollup_key(*parts):
+    return "|".join("" if p is None else str(p) for p in parts)
+
+
+def _rate(rejected, total):
+    return 100.0 * rejected / total if total else 0.0
+
+
+def _pending(invoice):
+    if invoice.get("Pending") is not None:
+        return _qty(invoice["Pending"])
+    return _qty(invoice.get("Amount")) - _qty(invoice.get("Paid"))
+
+
+def ageing_bucket(due_date, today):
+    overdue = (today - due_date).days if due_date else 0
+    for limit, label in AGEING_BUCKETS:
+        if limit is None or overdue <= limit:
+            return label
+
+
+class DashboardRollups:
+    def __init__(self, store):
+        self.store = store
+        self._rows = {}
+
+    # ---------------------------------------------------
+    # Grouping new source rows
+    # ---------------------------------------------------
+    # Each returns {rollup key: (descriptive columns, {counter: delta})}
+    # for a batch of source rows, so a refresh writes once per group
+    # rather than once per row.
+    def _lookup(self, entity, key):
+        # Job card / purchase order by key, fetched once per read
+        cache = self._rows.setdefault(entity, {})
+        if key not in cache:
+            cache[key] = self.store.get(entity, key) if key not in (None, "") else None
+        return cache[key] or {}
+
+    def _group_production(self, rows):
+        groups = {}
+        for row in rows:
+            fields = {"Date": row.get("Date"), "Shift": _label(row.get("Shift")),
+                      "Job Card No": row.get("Job Card No")}
+            _, counters = groups.setdefault(rollup_key(*fields.values()), (fields, defaultdict(float)))
+            counters["Produced Qty"] += _qty(row.get("Produced Qty"))
+            counters["Rejected Qty"] += _qty(row.get("Rejected Qty"))
+            counters["Entries"] += 1
+        return groups
+
+    def _group_grn(self, rows):
+        groups = {}
+        for row in rows:
+            received, rejected = _qty(row.get("Received Qty")), _qty(row.get("Rejected Qty"))
+            accepted = row.get("Accepted Qty")
+            accepted = received - rejected if accepted is None else _qty(accepted)
+            _, counters = groups.setdefault(_label(row.get("PO Number")), ({}, defaultdict(float)))
+            counters["Received Qty"] += received
+            counters["Accepted Qty"] += accepted
+            counters["Rejected Qty"] += rejected
+            counters["GRNs"] += 1
+        return groups
+
+    def _group_invoices(self, rows, sign=1):
+        groups = {}
+        for row in rows:
+            fields = {"Customer": _label(row.get("Customer")), "Due Date": row.get("Due Date")}
+            _, counters = groups.setdefault(rollup_key(*fields.values()), (fields, defaultdict(float)))
+            counters["Pending"] += sign * _pending(row)
+            counters["Invoices"] += sign
+        return groups
+
+    def _apply(self, rollup, groups, conn):
+        for key, (fields, counters) in groups.items():
+            self.store.increment(rollup, key, counters, conn=conn, fields=fields)
+
+    # ---------------------------------------------------
+    # Maintenance
+    # ---------------------------------------------------
+    def _state(self, source, conn=None):
+        row = self.store.get("Rollup State", source, conn=conn) or {}
+        return int(row.get("Rows") or 0), int(row.get("Last Id") or 0)
+
+    def refresh_source(self, source, batch_size=10000):
+        # Folds rows appended to `source` since the last refresh into its
+        # rollup, one transaction per batch; returns how many were applied
+        rollup = ROLLUPS[source]
+        group = {"Production Entry": self._group_production, "GRN": self._group_grn,
+                 "Invoices": self._group_invoices}[source]
+        seen, last_id = self._state(source)
+        count, max_id = self.store.version(source)
+        if (count, max_id) == (seen, last_id):
+            return 0
+        if count < seen:
+            # Rows were deleted: the old totals cannot be unpicked
+            return self.rebuild(source)
+
+        applied = 0
+        while last_id < max_id:
+            # A batch is read completely before it is written, so the read
+            # never holds a connection the writes (or lookups) need
+            rows = self.store.iter_new_rows(source, last_id, batch_size=batch_size)
+            batch = [(row_id, row) for row_id, row in islice(rows, batch_size) if row_id <= max_id]
+            rows.close()
+            if not batch:
+                break
+            state = (seen + applied, last_id)
+            last_id = batch[-1][0]
+            if not self._commit(source, rollup, group([row for _, row in batch]), state,
+                                (seen + applied + len(batch), last_id)):
+                # Another refresh (or a rebuild) got there first and carries on
+                return applied
+            applied += len(batch)
+        if seen + applied != count:
+            # Deletes hidden by newer inserts
+            return self.rebuild(source)
+        return applied
+
+    def _commit(self, source, rollup, groups, before, after):
+        # Applies a batch read at state `before` ((rows, last id)) and moves
+        # the state to `after`, unless the state moved meanwhile: the state
+        # row is locked and checked again first, so concurrent refreshes
+        # never fold in the same rows twice. Returns whether it applied.
+        with self.store.transaction() as conn:
+            self.store.upsert("Rollup State", {"Source": source}, conn=conn, defaults={"Last Id": 0, "Rows": 0})
+            self.store.lock("Rollup State", source, conn)
+            if self._state(source, conn=conn) != before:
+                return False
+            self._apply(rollup, groups, conn)
+            rows, last_id = after
+            self.store.upsert("Rollup State", {"Source": source, "Last Id": last_id, "Rows": rows}, conn=conn)
+        return True
+
+    def refresh(self):
+        # Returns {source: rows applied}
+        try:
+            return {source: self.refresh_source(source) for source in ROLLUPS}
+        finally:
+            self._rows.clear()
+
+    def rebuild(self, source=None):
+        # Recomputes one rollup (or all) from its whole source table
+        sources = [source] if source else list(ROLLUPS)
+        applied = 0
+        for source in sources:
+            with self.store.transaction() as conn:
+                self.store.clear(ROLLUPS[source], conn=conn)
+                self.store.upsert("Rollup State", {"Source": source, "Last Id": 0, "Rows": 0}, conn=conn)
+            applied += self.refresh_source(source)
+        return applied
+
+    def save_invoice(self, invoice):
+        # Upserts an invoice (e.g. after a payment) and moves its pending
+        # amount between receivables buckets in the same transaction
+        self.refresh_source("Invoices")
+        with self.store.transaction() as conn:
+            old = self.store.get("Invoices", invoice["Invoice No"], conn=conn)
+            self.store.upsert("Invoices", invoice, conn=conn)
+            if old is None:
+                return  # new invoices are picked up by refresh()
+            new = self.store.get("Invoices", invoice["Invoice No"], conn=conn)
+            groups = self._group_invoices([old], sign=-1)
+            for key, (fields, counters) in self._group_invoices([new]).items():
+                _, merged = groups.setdefault(key, (fields, defaultdict(float)))
+                for column, delta in counters.items():
+                    merged[column] += delta
+            self._apply("Receivables", groups, conn)
+
+    # ---------------------------------------------------
+    # Dashboard figures
+    # ---------------------------------------------------
+    def daily_production(self, since=None, until=None):
+        # Rows per date/shift/machine/operator with a Rejection % column;
+        # each job card's figures go to its current machine and operator
+        where = {}
+        if since is not None:
+            where["Date"] = (">=", since)
+        totals = {}
+        try:
+            for row in self.store.query("Daily Production", where=where or None):
+                if until is not None and row["Date"] is not None and row["Date"] > until:
+                    continue
+                card = self._lookup("Job Cards", row["Job Card No"])
+                fields = {"Date": row["Date"], "Shift": row["Shift"],
+                          "Machine": _label(card.get("Machine")), "Operator": _label(card.get("Operator"))}
+                total = totals.setdefault(rollup_key(*fields.values()),
+                                          {**fields, "Produced Qty": 0.0, "Rejected Qty": 0.0, "Entries": 0})
+                total["Produced Qty"] += _qty(row["Produced Qty"])
+                total["Rejected Qty"] += _qty(row["Rejected Qty"])
+                total["Entries"] += int(row["Entries"] or 0)
+        finally:
+            self._rows.clear()
+        rows = sorted(totals.values(), key=lambda r: (r["Date"] or date.min, r["Shift"], r["Machine"], r["Operator"]))
+        for row in rows:
+            row["Rejection %"] = _rate(row["Rejected Qty"], row["Produced Qty"] + row["Rejected Qty"])
+        return rows
+
+    def vendor_rejection(self):
+        # Vendors by GRN rejection rate, worst first; each purchase order's
+        # figures go to its current vendor
+        counters = ["Received Qty", "Accepted Qty", "Rejected Qty", "GRNs"]
+        vendors = {}
+        try:
+            for row in self.store.query("Vendor Quality"):
+                vendor = _label(self._lookup("Purchase Orders", row["PO Number"]).get("Vendor"))
+                total = vendors.setdefault(vendor, {"Vendor": vendor, **dict.fromkeys(counters, 0.0)})
+                for column in counters:
+                    total[column] += _qty(row[column])
+        finally:
+            self._rows.clear()
+        rows = list(vendors.values())
+        for row in rows:
+            row["GRNs"] = int(row["GRNs"])
+            row["Rejection %"] = _rate(row["Rejected Qty"], row["Received Qty"])
+        rows.sort(key=lambda r: (-r["Rejection %"], r["Vendor"]))
+        return rows
+
+    def receivables_ageing(self, today=None):
+        # Pending amount per customer in AGEING_BUCKETS, largest total first
+        today = today or date.today()
+        labels = [label for _, label in AGEING_BUCKETS]
+        customers = {}
+        for row in self.store.iter_rows("Receivables"):
+            pending = _qty(row["Pending"])
+            if abs(pending) < 1e-9:
+                continue
+            totals = customers.setdefault(row["Customer"], dict.fromkeys(labels + ["Total"], 0.0))
+            totals[ageing_bucket(row["Due Date"], today)] += pending
+            totals["Total"] += pending
+        rows = [{"Customer": customer, **totals} for customer, totals in customers.items()]
+        rows.sort(key=lambda r: (-r["Total"], r["Customer"]))
+        return rows
+
+    def dashboard(self, days=30, today=None):
+        # Catches up, then returns every dashboard table
+        today = today or date.today()
+        self.refresh()
+        return {
+            "Daily Production": self.daily_production(since=today - timedelta(days=days - 1), until=today),
+            "Vendor Rejection": self.vendor_rejection(),
+            "Receivables Ageing": self.receivables_ageing(today),
+        }
+
+    def sheet_rows(self, days=30, today=None):
+        # The dashboard as plain rows for the workbook's Dashboard sheet:
+        # per table a title row, a header row and its data, then a blank row
+        rows = []
+        for title, table in self.dashboard(days, today).items():
+            rows.append([title])
+            if table:
+                headers = list(table[0])
+                rows.append(headers)
+                rows.extend([row[h] for h in headers] for row in table)
+            rows.append([])
+        return rows
+
+
+def _print_table(title, rows, limit):
+    print(f"\n{title} ({len(rows)} rows)")
+    if not rows:
+        return
+    headers = list(rows[0])
+    print("  ".join(f"{h:>14}" for h in headers))
+    for row in rows[:limit]:
+        print("  ".join(f"{v:>14,.1f}" if isinstance(v, float) else f"{str(v):>14}" for v in row.values()))
+    if len(rows) > limit:
+        print(f"... {len(rows) - limit} more")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the production dashboard")
+    parser.add_argument("--store", default="sqlite:///factory_erp.db", help="ERP store URL (default: %(default)s)")
+    parser.add_argument("--days", type=int, default=30, help="days of daily production to show")
+    parser.add_argument("--limit", type=int, default=20, help="rows printed per table")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the rollups from scratch")
+    args = parser.parse_args(argv)
+
+    store = open_store(args.store)
+    try:
+        rollups = DashboardRollups(store)
+        start = time.perf_counter()
+        applied = rollups.rebuild() if args.rebuild else rollups.refresh()
+        print(f"rollups updated in {time.perf_counter() - start:.2f}s: {applied}")
+        start = time.perf_counter()
+        tables = rollups.dashboard(args.days)
+        print(f"dashboard loaded in {time.perf_counter() - start:.3f}s")
+        for title, rows in tables.items():
+            _print_table(title, rows, args.limit)
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+from collections import defaultdict
+from datetime import date
+
+# -------------------------------------------------------
+# Stock ledger with materialized balances
+#
+# Every GRN, issue, production entry and dispatch appends one signed row
+# to "Stock Ledger" and bumps the item's row in "Raw Material Inventory" /
+# "Finished Goods Inventory" with a single UPSERT, in the same transaction
+# as the source document. Posting therefore costs O(1) however long the
+# history is; the inventory sheets are a cache of the ledger, which
+# rebuild()/verify() can recompute at any time.
+# -------------------------------------------------------
+
+RAW = "Raw Material"
+FINISHED = "Finished Goods"
+
+# stock type -> (inventory entity, its item column)
+INVENTORY = {
+    RAW: ("Raw Material Inventory", "Item Code"),
+    FINISHED: ("Finished Goods Inventory", "Product"),
+}
+
+# (stock type, movement) -> (inventory counter column, sign of the ledger Qty)
+POSTINGS = {
+    (RAW, "Opening"): ("Opening Stock", 1),
+    (RAW, "GRN"): ("Received", 1),
+    (RAW, "Issue"): ("Issued", -1),
+    (FINISHED, "Opening"): ("Opening Stock", 1),
+    (FINISHED, "Production"): ("Produced", 1),
+    (FINISHED, "Dispatch"): ("Dispatched", -1),
+}
+
+
+def _qty(value):
+    return float(value or 0)
+
+
+class StockLedger:
+    def __init__(self, store):
+        self.store = store
+
+    # ---------------------------------------------------
+    # Posting
+    # ---------------------------------------------------
+    def post(self, stock_type, movement, item, qty, on=None, reference=None, conn=None):
+        # Appends a movement and updates the materialized balance; returns
+        # the item's new balance
+        if (stock_type, movement) not in POSTINGS:
+            raise ValueError(f"Unknown movement {movement!r} for {stock_type}")
+        if not item:
+            raise ValueError("Stock movements need an item")
+        column, sign = POSTINGS[(stock_type, movement)]
+        entity, _ = INVENTORY[stock_type]
+        qty = _qty(qty)
+        with self.store._connection(conn) as conn:
+            self.store.insert("Stock Ledger", {
+                "Date": on or date.today(), "Stock Type": stock_type, "Item": item,
+                "Movement": movement, "Reference": reference, "Qty": sign * qty,
+            }, conn=conn)
+            totals = self.store.increment(entity, item, {column: qty, "Balance": sign * qty}, conn=conn)
+        return totals["Balance"]
+
+    def set_opening(self, stock_type, item, qty, on=None, conn=None):
+        return self.post(stock_type, "Opening", item, qty, on=on, reference="Opening", conn=conn)
+
+    def receive_grn(self, grn):
+        # Saves a "GRN" row and receives its accepted quantity into stock
+        accepted = grn.get("Accepted Qty")
+        if accepted in (None, ""):
+            accepted = _qty(grn.get("Received Qty")) - _qty(grn.get("Rejected Qty"))
+        with self.store.transaction() as conn:
+            self.store.insert("GRN", grn, conn=conn)
+            return self.post(RAW, "GRN", grn.get("Item"), accepted, on=grn.get("Date"),
+                             reference=grn.get("GRN Number"), conn=conn)
+
+    def issue(self, item, qty, on=None, reference=None):
+        return self.post(RAW, "Issue", item, qty, on=on, reference=reference)
+
+    def record_production(self, entry):
+        # Saves a "Production Entry" row and books its good output to stock
+        with self.store.transaction() as conn:
+            self.store.insert("Production Entry", entry, conn=conn)
+            return self.post(FINISHED, "Production", entry.get("Product"), entry.get("Produced Qty"),
+                             on=entry.get("Date"), reference=entry.get("Job Card No"), conn=conn)
+
+    def record_dispatch(self, dispatch):
+        # Saves a "Dispatch" row and takes the quantity out of stock
+        with self.store.transaction() as conn:
+            self.store.insert("Dispatch", dispatch, conn=conn)
+            return self.post(FINISHED, "Dispatch", dispatch.get("Product"), dispatch.get("Quantity"),
+                             on=dispatch.get("Dispatch Date"), reference=dispatch.get("Dispatch No"),
+                             conn=conn)
+
+    # ---------------------------------------------------
+    # Queries
+    # ---------------------------------------------------
+    def balance(self, stock_type, item):
+        entity, _ = INVENTORY[stock_type]
+        row = self.store.get(entity, item)
+        return _qty(row["Balance"]) if row else 0.0
+
+    def balance_at(self, stock_type, item, as_of):
+        # Balance at the end of `as_of`, from the ledger
+        return _qty(self.store.sum("Stock Ledger", "Qty", where={
+            "Stock Type": stock_type, "Item": item, "Date": ("<=", as_of)}))
+
+    # ---------------------------------------------------
+    # Reconciliation
+    # ---------------------------------------------------
+    def _ledger_totals(self, conn=None):
+        # {(stock type, item): {counter column: total, "Balance": total}}
+        totals = defaultdict(lambda: defaultdict(float))
+        for row in self.store.iter_rows("Stock Ledger", conn=conn):
+            stock_type = row["Stock Type"]
+            column, sign = POSTINGS[(stock_type, row["Movement"])]
+            qty = _qty(row["Qty"])
+            counters = totals[(stock_type, row["Item"])]
+            counters[column] += sign * qty
+            counters["Balance"] += qty
+        return totals
+
+    def verify(self, tolerance=1e-6):
+        # Compares the materialized inventory rows with a full ledger replay.
+        # Returns [(stock type, item, column, stored, expected)] mismatches.
+        expected = self._ledger_totals()
+        mismatches = []
+        for stock_type, (entity, item_col) in INVENTORY.items():
+            counters = [c for (t, _), (c, _) in POSTINGS.items() if t == stock_type] + ["Balance"]
+            seen = set()
+            for row in self.store.iter_rows(entity):
+                item = row[item_col]
+                seen.add(item)
+                want = expected.get((stock_type, item), {})
+                for column in counters:
+                    stored, exp = _qty(row[column]), want.get(column, 0.0)
+                    if abs(stored - exp) > tolerance:
+                        mismatches.append((stock_type, item, column, stored, exp))
+            for (t, item), want in expected.items():
+                if t == stock_type and item not in seen:
+                    mismatches.append((stock_type, item, "Balance", None, want["Balance"]))
+        return mismatches
+
+    def seed_openings(self, conn=None):
+        # Gives inventory rows that have no ledger history (e.g. loaded by
+        # import_erp_workbook) ledger rows explaining their counters, so the
+        # ledger can take over without losing stock. Only the ledger is
+        # written; the inventory rows stay as they are. Any part of Balance
+        # the counters do not account for goes into the Opening movement.
+        # Returns how many items were seeded.
+        seeded = 0
+        with self.store._connection(conn) as conn:
+            history = set(self._ledger_totals(conn=conn))
+            for stock_type, (entity, item_col) in INVENTORY.items():
+                postings = [(movement, column, sign) for (t, movement), (column, sign) in POSTINGS.items()
+                            if t == stock_type]
+                for row in self.store.iter_rows(entity, conn=conn):
+                    item = row[item_col]
+                    if not item or (stock_type, item) in history:
+                        continue
+                    moves = {movement: sign * _qty(row[column]) for movement, column, sign in postings}
+                    moves["Opening"] += _qty(row["Balance"]) - sum(moves.values())
+                    self.store.insert_many("Stock Ledger", ({
+                        "Date": date.today(), "Stock Type": stock_type, "Item": item,
+                        "Movement": movement, "Reference": "Opening balance", "Qty": qty,
+                    } for movement, qty in moves.items() if qty), conn=conn)
+                    seeded += 1
+        return seeded
+
+    def rebuild(self):
+        # Rewrites both inventory sheets from the ledger in one transaction.
+        # Rows the ledger has never seen are seeded first rather than zeroed.
+        with self.store.transaction() as conn:
+            self.seed_openings(conn=conn)
+            expected = self._ledger_totals(conn=conn)
+            for stock_type, (entity, item_col) in INVENTORY.items():
+                counters = [c for (t, _), (c, _) in POSTINGS.items() if t == stock_type] + ["Balance"]
+                items = {row[item_col] for row in self.store.iter_rows(entity, conn=conn)}
+                items.update(item for t, item in expected if t == stock_type)
+                for item in items:
+                    want = expected.get((stock_type, item), {})
+                    self.store.upsert(entity, {item_col: item, **{c: want.get(c, 0.0) for c in counters}},
+                                      conn=conn)
+        return len(expected)
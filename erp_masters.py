@@ -0,0 +1,243 @@
+import re
+import time
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+# -------------------------------------------------------
+# Master-data lookup (Vendor / Item / Customer Master)
+#
+# Each master is held in memory with two indexes, built once from the ERP
+# store and then kept current by applying only what changed:
+#   - a sorted list of (term, key) for prefix matches on the key, the name
+#     and each word of the name (bisect: O(log n) per lookup)
+#   - trigram -> keys postings for "contains" matches, intersected
+#     smallest-first and confirmed against the text
+# Lookups never touch the store, so they stay well under a millisecond
+# at 100k rows.
+# -------------------------------------------------------
+
+# name -> (ERP entity, key column, searchable columns)
+MASTERS = {
+    "vendor": ("Vendor Master", "Vendor ID", ["Vendor ID", "Vendor Name"]),
+    "item": ("Item Master", "Item Code", ["Item Code", "Item Name"]),
+    "customer": ("Customer Master", "Customer ID", ["Customer ID", "Customer Name"]),
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text):
+    return _SPACES.sub(" ", str(text or "")).strip().casefold()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class MasterIndex:
+    def __init__(self, key_column, search_columns):
+        self.key_column = key_column
+        self.search_columns = search_columns
+        self.rows = {}
+        self._terms = []
+        self._grams = defaultdict(set)
+        self._texts = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _index_terms(self, row):
+        texts = [normalize(row.get(c)) for c in self.search_columns]
+        texts = [t for t in texts if t]
+        terms = set(texts)
+        for text in texts:
+            terms.update(text.split(" "))
+        grams = set()
+        for text in texts:
+            grams |= _trigrams(text)
+        return texts, terms, grams
+
+    # ---------------------------------------------------
+    # Building / updating
+    # ---------------------------------------------------
+    def build(self, rows):
+        # Bulk load: one sort instead of an insort per term
+        self.rows.clear()
+        self._grams.clear()
+        self._texts.clear()
+        terms = []
+        for row in rows:
+            key = row.get(self.key_column)
+            if key in (None, ""):
+                continue
+            texts, row_terms, grams = self._index_terms(row)
+            self.rows[key] = row
+            self._texts[key] = texts
+            terms.extend((term, key) for term in row_terms)
+            for gram in grams:
+                self._grams[gram].add(key)
+        terms.sort()
+        self._terms = terms
+        return len(self.rows)
+
+    def add(self, row):
+        # Inserts or replaces one row
+        key = row.get(self.key_column)
+        if key in (None, ""):
+            return
+        if key in self.rows:
+            self.remove(key)
+        texts, terms, grams = self._index_terms(row)
+        self.rows[key] = row
+        self._texts[key] = texts
+        for term in terms:
+            insort(self._terms, (term, key))
+        for gram in grams:
+            self._grams[gram].add(key)
+
+    def remove(self, key):
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        del self._texts[key]
+        _, terms, grams = self._index_terms(row)
+        for term in terms:
+            i = bisect_left(self._terms, (term, key))
+            if i < len(self._terms) and self._terms[i] == (term, key):
+                del self._terms[i]
+        for gram in grams:
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    # ---------------------------------------------------
+    # Lookup
+    # ---------------------------------------------------
+    def search(self, query, limit=10):
+        # Rows matching `query`: exact key first, then prefix matches on
+        # key/name/words, then names or keys containing it
+        q = normalize(query)
+        if not q:
+            return []
+        found = {}
+        key = str(query).strip()
+        if key in self.rows:
+            found[key] = None
+
+        i = bisect_left(self._terms, (q,))
+        while len(found) < limit and i < len(self._terms):
+            term, key = self._terms[i]
+            if not term.startswith(q):
+                break
+            found.setdefault(key, None)
+            i += 1
+
+        if len(found) < limit and len(q) >= 3:
+            # Walk the rarest trigram's keys, checking the others as we go,
+            # and stop as soon as enough rows are confirmed
+            postings = sorted((self._grams.get(g, ()) for g in _trigrams(q)), key=len)
+            contains = []
+            for key in postings[0]:
+                if key in found or not all(key in keys for keys in postings[1:]):
+                    continue
+                if any(q in text for text in self._texts[key]):
+                    contains.append(key)
+                    if len(found) + len(contains) >= limit:
+                        break
+            for key in sorted(contains, key=str):
+                found[key] = None
+        return [self.rows[key] for key in found]
+
+    def get(self, key):
+        return self.rows.get(key)
+
+
+class MasterData:
+    # Indexes for every master in MASTERS, fed from an ERPStore.
+    # refresh() catches up on rows appended since the last call; rows
+    # changed in place must go through save() (or a full load()) to show.
+    # One instance is shared by every Streamlit session, so reads and
+    # updates of the indexes are serialized by a lock.
+    def __init__(self, store):
+        self.store = store
+        self.indexes = {}
+        self._seen = {}
+        self._checked = {}  # name -> time.monotonic() of the last store check
+        self._lock = threading.RLock()
+
+    def __getitem__(self, name):
+        return self.indexes[name]
+
+    def _build(self, name):
+        entity, key_column, columns = MASTERS[name]
+        last_id = 0
+        rows = []
+        for row_id, row in self.store.iter_new_rows(entity):
+            rows.append(row)
+            last_id = row_id
+        index = MasterIndex(key_column, columns)
+        index.build(rows)
+        self.indexes[name] = index
+        self._seen[name] = (len(rows), last_id)
+        self._checked[name] = time.monotonic()
+        return len(rows)
+
+    def load(self):
+        with self._lock:
+            for name in MASTERS:
+                self._build(name)
+        return self
+
+    def refresh(self, *names, max_age=0):
+        # Applies new rows only; falls back to a rebuild after deletes.
+        # Checks the named masters (all by default), skipping any checked
+        # less than `max_age` seconds ago. Returns {name: rows applied}.
+        with self._lock:
+            return self._refresh(names or MASTERS, max_age)
+
+    def _refresh(self, names, max_age):
+        applied = {}
+        now = time.monotonic()
+        for name in names:
+            if now - self._checked.get(name, float("-inf")) < max_age:
+                continue
+            self._checked[name] = now
+            entity, _, _ = MASTERS[name]
+            count, last_id = self._seen[name]
+            store_count, store_last = self.store.version(entity)
+            if (store_count, store_last) == (count, last_id):
+                continue
+            index = self.indexes[name]
+            new = 0
+            for row_id, row in self.store.iter_new_rows(entity, last_id):
+                index.add(row)
+                last_id = row_id
+                new += 1
+            if store_count != count + new:
+                # Rows were deleted: rebuild this master from scratch
+                applied[name] = self._build(name)
+            else:
+                self._seen[name] = (count + new, last_id)
+                applied[name] = new
+        return applied
+
+    def save(self, name, row):
+        # Upserts a master row and updates its index in place
+        entity, _, _ = MASTERS[name]
+        with self._lock:
+            self.store.upsert(entity, row)
+            index = self.indexes[name]
+            key = row[index.key_column]
+            # New rows are picked up again by the next refresh(); add() replaces
+            index.add({**index.rows.get(key, {}), **row})
+
+    def search(self, name, query, limit=10):
+        with self._lock:
+            return self.indexes[name].search(query, limit)
+
+
+def open_master_data(store):
+    return MasterData(store).load()
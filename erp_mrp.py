@@ -0,0 +1,155 @@
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from ERP_database import sheet_headers
+
+# -------------------------------------------------------
+# Material requirements planning (MRP)
+#
+# All steps are pandas merges/group-bys over whole tables:
+#   1. flatten the multi-level BOM to product -> raw material per unit
+#      (one merge per BOM level, never per plan or per row)
+#   2. sum open Production Plan demand per product and multiply through
+#   3. net gross requirements against on-hand stock, minimum stock and
+#      open purchase-order quantity
+#   4. turn shortages into suggested "Purchase Orders" rows
+# Tables are DataFrames with the ERP_SCHEMA headers as columns.
+# -------------------------------------------------------
+
+CLOSED_PLAN_STATUSES = {"Completed", "Closed", "Cancelled"}
+CLOSED_PO_STATUSES = {"Received", "Closed", "Cancelled"}
+
+MRPResult = namedtuple("MRPResult", ["requirements", "shortages", "suggested_pos"])
+
+
+def _is_open(status, closed):
+    return ~status.fillna("").astype(str).str.strip().isin(closed)
+
+
+def flatten_bom(bom, max_levels=25):
+    # Product Code -> leaf Raw Material Code with the quantity needed per
+    # unit of product across all levels. Intermediate assemblies (codes that
+    # have their own BOM lines) are exploded, not purchased.
+    edges = (bom[["Product Code", "Raw Material Code", "Quantity Required"]]
+             .dropna(subset=["Product Code", "Raw Material Code"])
+             .astype({"Quantity Required": float})
+             .groupby(["Product Code", "Raw Material Code"], as_index=False, sort=False)
+             .sum())
+    parents = pd.Index(edges["Product Code"].unique())
+
+    frontier = edges.rename(columns={"Raw Material Code": "Component", "Quantity Required": "Qty Per"})
+    children = edges.rename(columns={"Product Code": "Component", "Raw Material Code": "Child",
+                                     "Quantity Required": "Child Qty"})
+    leaves = []
+    for _ in range(max_levels):
+        is_parent = frontier["Component"].isin(parents)
+        leaves.append(frontier[~is_parent])
+        frontier = frontier[is_parent]
+        if frontier.empty:
+            break
+        nxt = frontier.merge(children, on="Component", sort=False)
+        frontier = (pd.DataFrame({
+            "Product Code": nxt["Product Code"].to_numpy(),
+            "Component": nxt["Child"].to_numpy(),
+            "Qty Per": nxt["Qty Per"].to_numpy() * nxt["Child Qty"].to_numpy(),
+        }).groupby(["Product Code", "Component"], as_index=False, sort=False).sum())
+    else:
+        raise ValueError(f"BOM is nested deeper than {max_levels} levels (circular BOM?)")
+
+    return (pd.concat(leaves, ignore_index=True)
+            .groupby(["Product Code", "Component"], as_index=False, sort=False)["Qty Per"].sum())
+
+
+def open_po_quantities(purchase_orders, grn=None):
+    # Quantity still to arrive per Item on open POs (ordered minus received)
+    pos = purchase_orders[_is_open(purchase_orders["Status"], CLOSED_PO_STATUSES)]
+    ordered = pos[["PO Number", "Item"]].assign(Qty=pos["Quantity"].astype(float).fillna(0.0))
+    if grn is not None and not grn.empty:
+        received = grn.groupby("PO Number")["Received Qty"].sum().astype(float)
+        ordered["Qty"] = (ordered["Qty"] - ordered["PO Number"].map(received).fillna(0.0)).clip(lower=0.0)
+    return ordered.groupby("Item")["Qty"].sum()
+
+
+def run_mrp(bom, production_plan, inventory, purchase_orders, grn=None, item_master=None,
+            vendor_master=None, today=None):
+    today = today or date.today()
+
+    # ---------------------------------------------------
+    # Gross requirements from open plans
+    # ---------------------------------------------------
+    plans = production_plan[_is_open(production_plan["Status"], CLOSED_PLAN_STATUSES)]
+    need_date = pd.to_datetime(plans["Start Date"].fillna(plans["Date"]), errors="coerce")
+    demand = (pd.DataFrame({"Product Code": plans["Product"],
+                            "Planned Qty": plans["Planned Qty"].astype(float).fillna(0.0),
+                            "Need Date": need_date})
+              .groupby("Product Code", as_index=False, sort=False)
+              .agg({"Planned Qty": "sum", "Need Date": "min"}))
+
+    exploded = demand.merge(flatten_bom(bom), on="Product Code", sort=False)
+    exploded["Gross Qty"] = exploded["Planned Qty"].to_numpy() * exploded["Qty Per"].to_numpy()
+    req = (exploded.groupby("Component", sort=True)
+           .agg({"Gross Qty": "sum", "Need Date": "min"})
+           .rename_axis("Item Code"))
+
+    # ---------------------------------------------------
+    # Netting
+    # ---------------------------------------------------
+    on_hand = inventory.groupby("Item Code")["Balance"].sum().astype(float)
+    open_po = open_po_quantities(purchase_orders, grn)
+    req["On Hand"] = req.index.map(on_hand).fillna(0.0).to_numpy()
+    req["Open PO Qty"] = req.index.map(open_po).fillna(0.0).to_numpy()
+    if item_master is not None and not item_master.empty:
+        items = item_master.drop_duplicates("Item Code").set_index("Item Code")
+        req["Min Stock"] = req.index.map(items["Min Stock"].astype(float)).fillna(0.0).to_numpy()
+    else:
+        req["Min Stock"] = 0.0
+    req["Net Qty"] = req["Gross Qty"] + req["Min Stock"] - req["On Hand"] - req["Open PO Qty"]
+    req["Shortage Qty"] = np.maximum(req["Net Qty"].to_numpy(), 0.0)
+    requirements = req.reset_index()
+
+    shortages = requirements[requirements["Shortage Qty"] > 0].reset_index(drop=True)
+    return MRPResult(requirements, shortages,
+                     suggest_purchase_orders(shortages, item_master, vendor_master, today))
+
+
+def suggest_purchase_orders(shortages, item_master=None, vendor_master=None, today=None):
+    # One suggested PO per short item, shaped like the "Purchase Orders" sheet
+    today = today or date.today()
+    sugg = pd.DataFrame({
+        "PO Number": [f"SUGG-{i:05d}" for i in range(1, len(shortages) + 1)],
+        "Date": today,
+        "Vendor": None,
+        "Item": shortages["Item Code"].to_numpy(),
+        "Quantity": np.ceil(shortages["Shortage Qty"].to_numpy()),
+        "Rate": np.nan,
+        "Expected Delivery": shortages["Need Date"].dt.date.to_numpy(),
+        "Status": "Suggested",
+    })
+    if item_master is not None and not item_master.empty:
+        cost = item_master.drop_duplicates("Item Code").set_index("Item Code")["Standard Cost"]
+        sugg["Rate"] = sugg["Item"].map(cost).to_numpy()
+    if vendor_master is not None and not vendor_master.empty:
+        # First vendor listed for the material, as named in "Material Supplied"
+        vendors = vendor_master.drop_duplicates("Material Supplied").set_index("Material Supplied")["Vendor ID"]
+        sugg["Vendor"] = sugg["Item"].map(vendors).to_numpy()
+    return sugg[sheet_headers("Purchase Orders")]
+
+
+def _store_frame(store, entity):
+    return pd.DataFrame(list(store.iter_rows(entity)), columns=sheet_headers(entity))
+
+
+def run_mrp_from_store(store, today=None):
+    return run_mrp(
+        _store_frame(store, "BOM"),
+        _store_frame(store, "Production Plan"),
+        _store_frame(store, "Raw Material Inventory"),
+        _store_frame(store, "Purchase Orders"),
+        grn=_store_frame(store, "GRN"),
+        item_master=_store_frame(store, "Item Master"),
+        vendor_master=_store_frame(store, "Vendor Master"),
+        today=today,
+    )
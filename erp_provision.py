@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from ERP_database import ensure_erp_exists
+from erp_store import open_store
+
+# -------------------------------------------------------
+# Per-plant ERP provisioning
+#
+#   python erp_provision.py --plants P01,P02,P03
+#   python erp_provision.py --count 12 --url "postgresql://erp@db/{plant}"
+#   python erp_provision.py --plants-file plants.json --workbooks plants/
+#
+# Creates or migrates one ERP store per plant, all plants at once, from the
+# single ERP_SCHEMA. Migration is ERPStore.create_schema(): missing tables,
+# columns and indexes are added and nothing else is touched, so re-running
+# it on an up-to-date plant is a few catalog reads. A plants file maps
+# plant code -> store URL; otherwise --url is a template with {plant}.
+# -------------------------------------------------------
+
+DEFAULT_URL = "sqlite:///plants/{plant}.db"
+
+
+def plant_urls(plants=None, count=None, plants_file=None, url=DEFAULT_URL):
+    if plants_file:
+        with open(plants_file, "r", encoding="utf-8") as f:
+            return dict(json.load(f))
+    if plants:
+        codes = [p.strip() for p in plants.split(",") if p.strip()]
+    elif count:
+        codes = [f"PLANT{i:02d}" for i in range(1, count + 1)]
+    else:
+        raise ValueError("Give --plants, --count or --plants-file")
+    return {code: url.format(plant=code) for code in codes}
+
+
+def provision_plant(plant, url, workbook_dir=None):
+    # Returns a report dict; errors are reported, not raised, so one broken
+    # plant does not stop the others
+    start = time.perf_counter()
+    report = {"plant": plant, "url": url, "changes": [], "error": None}
+    try:
+        if url.startswith("sqlite:///"):
+            directory = os.path.dirname(url[len("sqlite:///"):])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        store = open_store(url, create=False)
+        try:
+            report["changes"] = store.create_schema()
+        finally:
+            store.close()
+        if workbook_dir:
+            os.makedirs(workbook_dir, exist_ok=True)
+            ensure_erp_exists(os.path.join(workbook_dir, f"Factory_ERP_{plant}.xlsx"))
+    except Exception as exc:
+        report["error"] = f"{type(exc).__name__}: {exc}"
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def provision_plants(urls, workers=None, workbook_dir=None, progress=None):
+    # Provisions every plant in `urls` ({plant: store URL}) concurrently;
+    # returns the reports in plant order
+    workers = workers or min(len(urls), 16) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {plant: pool.submit(provision_plant, plant, url, workbook_dir)
+                   for plant, url in urls.items()}
+        reports = []
+        for plant, future in futures.items():
+            report = future.result()
+            if progress is not None:
+                progress(report)
+            reports.append(report)
+    return reports
+
+
+def _print_report(report):
+    changes = report["changes"]
+    tables = sum(1 for kind, _ in changes if kind == "create table")
+    columns = sum(1 for kind, _ in changes if kind == "add column")
+    status = report["error"] or ("up to date" if not changes else "migrated" if columns else "created")
+    print(f"{report['plant']:<10} {tables:>6} {columns:>7} {report['seconds'] * 1e3:>9.1f} ms  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create or migrate the ERP store of every plant")
+    parser.add_argument("--plants", help="comma-separated plant codes")
+    parser.add_argument("--count", type=int, help="provision PLANT01..PLANTnn")
+    parser.add_argument("--plants-file", help="JSON object of plant code -> store URL")
+    parser.add_argument("--url", default=DEFAULT_URL, help="store URL template (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="plants provisioned at once")
+    parser.add_argument("--workbooks", default=None,
+                        help="also create a blank Factory_ERP_<plant>.xlsx per plant in this directory")
+    args = parser.parse_args(argv)
+
+    try:
+        urls = plant_urls(args.plants, args.count, args.plants_file, args.url)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    print(f"{'plant':<10} {'tables':>6} {'columns':>7} {'time':>12}  status")
+    start = time.perf_counter()
+    reports = provision_plants(urls, args.workers, args.workbooks, progress=_print_report)
+    failed = [r for r in reports if r["error"]]
+    print(f"{len(reports)} plants in {time.perf_counter() - start:.2f}s, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
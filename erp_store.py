@@ -0,0 +1,537 @@
+import re
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from ERP_database import ERP_SCHEMA, TEXT, NUMBER, INTEGER, DATE, DATETIME
+
+# -------------------------------------------------------
+# Transactional ERP store
+#
+#   store = open_store("sqlite:///factory_erp.db")        # local
+#   store = open_store("postgresql://user:pw@host/erp")   # production
+#   store.insert("GRN", {"GRN Number": "GRN-1", "Received Qty": 10, ...})
+#   store.query("GRN", where={"PO Number": "PO-7"})
+#
+# Rows go in and come out as dicts keyed by the sheet headers in
+# ERP_SCHEMA, with values coerced to the declared column types. Each entity
+# is its own indexed table, so a write touches one row instead of the whole
+# workbook. create_erp_file(store=...) exports the store to Excel.
+# -------------------------------------------------------
+
+
+def table_name(entity):
+    return re.sub(r"[^0-9a-z]+", "_", entity.lower()).strip("_")
+
+
+def column_name(header):
+    return re.sub(r"[^0-9a-z]+", "_", header.lower()).strip("_")
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
+
+_COERCE = {
+    TEXT: str,
+    NUMBER: float,
+    INTEGER: int,
+    DATE: _to_date,
+    DATETIME: _to_datetime,
+}
+
+
+def coerce_value(value, col_type):
+    if value is None or value == "":
+        return None
+    try:
+        return _COERCE[col_type](value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Cannot store {value!r} as {col_type}") from None
+
+
+class _Table:
+    # Precomputed names/SQL fragments for one ERP entity
+    def __init__(self, entity, spec):
+        self.entity = entity
+        self.name = table_name(entity)
+        self.headers = [h for h, _ in spec["columns"]]
+        self.types = dict(spec["columns"])
+        self.columns = {h: column_name(h) for h in self.headers}
+        self.key = spec["key"]
+        self.indexes = spec["indexes"]
+
+    def encode(self, row):
+        unknown = set(row) - set(self.types)
+        if unknown:
+            raise ValueError(f"{self.entity} has no column(s) {sorted(unknown)}")
+        return [coerce_value(row.get(h), self.types[h]) for h in self.headers]
+
+    def decode(self, values):
+        return {h: coerce_value(v, self.types[h]) for h, v in zip(self.headers, values)}
+
+
+class ERPStore:
+    # Backend-independent API. Subclasses provide the SQL dialect and the
+    # connection pool (_acquire/_release).
+    placeholder = "?"
+    column_types = {}
+    id_column = ""
+
+    def __init__(self):
+        self.tables = {entity: _Table(entity, spec) for entity, spec in ERP_SCHEMA.items()}
+
+    # ---------------------------------------------------
+    # Connections / transactions
+    # ---------------------------------------------------
+    @contextmanager
+    def transaction(self):
+        # Yields a pooled connection; commits on success, rolls back on error.
+        # Pass it as conn= to group several writes atomically.
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def _connection(self, conn):
+        if conn is not None:
+            yield conn
+        else:
+            with self.transaction() as conn:
+                yield conn
+
+    def close(self):
+        raise NotImplementedError
+
+    # ---------------------------------------------------
+    # Schema
+    # ---------------------------------------------------
+    def create_schema(self, conn=None):
+        # Creates missing tables and adds missing columns/indexes; safe to run
+        # on every start, including by several processes at once (every
+        # statement tolerates the object already being there). Existing rows
+        # are never rewritten: new columns are nullable ADD COLUMNs, which
+        # both backends apply as a catalog change. Returns the list of
+        # changes made (empty when up to date).
+        changes = []
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            self._lock_schema(cur)
+            existing = self._existing_columns(cur)
+            for table in self.tables.values():
+                have = existing.get(table.name)
+                if have is None:
+                    cols = [self.id_column]
+                    for header in table.headers:
+                        col = f"{table.columns[header]} {self.column_types[table.types[header]]}"
+                        if header == table.key:
+                            col += " NOT NULL UNIQUE"
+                        cols.append(col)
+                    cur.execute(f"CREATE TABLE IF NOT EXISTS {table.name} ({', '.join(cols)})")
+                    changes.append(("create table", table.name))
+                else:
+                    for header in table.headers:
+                        col = table.columns[header]
+                        if col in have or not self._add_column(cur, table.name, col,
+                                                               self.column_types[table.types[header]]):
+                            continue
+                        changes.append(("add column", f"{table.name}.{col}"))
+                        if header == table.key:
+                            # Constraints cannot come with ADD COLUMN in SQLite
+                            cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{table.name}_{col} "
+                                        f"ON {table.name} ({col})")
+                for header in table.indexes:
+                    col = table.columns[header]
+                    cur.execute(f"CREATE INDEX IF NOT EXISTS ix_{table.name}_{col} ON {table.name} ({col})")
+        return changes
+
+    def _existing_columns(self, cur):
+        # {table name: set of column names} for the tables already present
+        raise NotImplementedError
+
+    def _lock_schema(self, cur):
+        # Serializes create_schema across processes where the backend can
+        pass
+
+    def _add_column(self, cur, table, column, col_type):
+        # Returns False when the column was already added by someone else
+        raise NotImplementedError
+
+    # ---------------------------------------------------
+    # Writes
+    # ---------------------------------------------------
+    def _insert_sql(self, table):
+        cols = ", ".join(table.columns[h] for h in table.headers)
+        marks = ", ".join([self.placeholder] * len(table.headers))
+        return f"INSERT INTO {table.name} ({cols}) VALUES ({marks})"
+
+    def insert(self, entity, row, conn=None):
+        self.insert_many(entity, [row], conn=conn)
+
+    def insert_many(self, entity, rows, conn=None, batch_size=1000):
+        table = self.tables[entity]
+        sql = self._insert_sql(table)
+        count = 0
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            batch = []
+            for row in rows:
+                batch.append(table.encode(row))
+                if len(batch) >= batch_size:
+                    cur.executemany(sql, batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                cur.executemany(sql, batch)
+                count += len(batch)
+        return count
+
+    def upsert(self, entity, row, conn=None, defaults=None):
+        # Insert, or update the given columns of the row with the same key.
+        # `defaults` are columns written only when the row is inserted.
+        table = self.tables[entity]
+        if table.key is None:
+            raise ValueError(f"{entity} has no unique key column")
+        if table.key not in row:
+            raise ValueError(f"upsert into {entity} needs {table.key!r}")
+        values = table.encode({**(defaults or {}), **row})
+        cols = ", ".join(table.columns[h] for h in table.headers)
+        marks = ", ".join([self.placeholder] * len(table.headers))
+        updates = ", ".join(f"{table.columns[h]} = excluded.{table.columns[h]}"
+                            for h in table.headers if h in row and h != table.key)
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        # Columns not given in `row` are only written when inserting
+        sql = (f"INSERT INTO {table.name} ({cols}) VALUES ({marks}) "
+               f"ON CONFLICT ({table.columns[table.key]}) {action}")
+        with self._connection(conn) as conn:
+            conn.cursor().execute(sql, values)
+
+    def lock(self, entity, key, conn):
+        # Locks the row with business key `key` until `conn` commits, so
+        # writers that lock it first queue up (a no-op update: a row lock on
+        # PostgreSQL, the database write lock on SQLite). Returns whether
+        # the row exists.
+        table = self.tables[entity]
+        if table.key is None:
+            raise ValueError(f"{entity} has no unique key column")
+        col = table.columns[table.key]
+        cur = conn.cursor()
+        cur.execute(f"UPDATE {table.name} SET {col} = {col} WHERE {col} = {self.placeholder}",
+                    [coerce_value(key, table.types[table.key])])
+        return cur.rowcount > 0
+
+    def increment(self, entity, key, deltas, conn=None, fields=None):
+        # Adds `deltas` ({numeric header: amount}) to the row with business
+        # key `key`, creating it if needed, in one statement. `fields` are
+        # other columns to set when the row is created. Returns the new
+        # values of the incremented columns.
+        table = self.tables[entity]
+        if table.key is None:
+            raise ValueError(f"{entity} has no unique key column")
+        headers = list(deltas)
+        for header in headers:
+            if table.types.get(header) not in (NUMBER, INTEGER):
+                raise ValueError(f"{entity}.{header} is not numeric")
+        fields = fields or {}
+        cols = [table.columns[table.key]] + [table.columns[h] for h in headers]
+        params = [coerce_value(key, table.types[table.key])] + [
+            coerce_value(deltas[h], table.types[h]) or 0 for h in headers]
+        updates = ", ".join(f"{c} = COALESCE({table.name}.{c}, 0) + excluded.{c}" for c in cols[1:])
+        returning = ", ".join(cols[1:])
+        cols += [table.columns[h] for h in fields]
+        params += [coerce_value(value, table.types[h]) for h, value in fields.items()]
+        marks = ", ".join([self.placeholder] * len(cols))
+        sql = (f"INSERT INTO {table.name} ({', '.join(cols)}) VALUES ({marks}) "
+               f"ON CONFLICT ({cols[0]}) DO UPDATE SET {updates} "
+               f"RETURNING {returning}")
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            return dict(zip(headers, cur.fetchone()))
+
+    def delete(self, entity, where, conn=None):
+        # `where` is required so a typo can't wipe a whole table
+        table = self.tables[entity]
+        if not where:
+            raise ValueError("delete() needs a where clause")
+        where_sql, params = self._where_sql(table, where)
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(f"DELETE FROM {table.name}{where_sql}", params)
+            return cur.rowcount
+
+    def clear(self, entity, conn=None):
+        # Deletes every row; for derived tables that are rebuilt from their
+        # sources (delete() insists on a where clause)
+        if not ERP_SCHEMA[entity].get("derived"):
+            raise ValueError(f"{entity} is not a derived table")
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(f"DELETE FROM {self.tables[entity].name}")
+            return cur.rowcount
+
+    # ---------------------------------------------------
+    # Reads
+    # ---------------------------------------------------
+    _OPERATORS = {"=", "!=", "<", "<=", ">", ">="}
+
+    def _where_sql(self, table, where):
+        # {header: value} for equality, or {header: (op, value)} with op one
+        # of =, !=, <, <=, >, >=
+        if not where:
+            return "", []
+        clauses = []
+        params = []
+        for header, value in where.items():
+            if header not in table.types:
+                raise ValueError(f"{table.entity} has no column {header!r}")
+            op = "="
+            if isinstance(value, tuple):
+                op, value = value
+                if op not in self._OPERATORS:
+                    raise ValueError(f"Unsupported operator {op!r}")
+            clauses.append(f"{table.columns[header]} {op} {self.placeholder}")
+            params.append(coerce_value(value, table.types[header]))
+        return " WHERE " + " AND ".join(clauses), params
+
+    def _select_sql(self, table, where, order_by, limit, offset=0):
+        cols = ", ".join(table.columns[h] for h in table.headers)
+        where_sql, params = self._where_sql(table, where)
+        sql = f"SELECT {cols} FROM {table.name}{where_sql}"
+        order = [table.columns[h] for h in (order_by or [])]
+        sql += " ORDER BY " + ", ".join(order + ["id"])
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        if offset:
+            sql += f" OFFSET {int(offset)}"
+        return sql, params
+
+    def query(self, entity, where=None, order_by=None, limit=None, offset=0, conn=None):
+        return list(self.iter_rows(entity, where, order_by, limit, offset, conn=conn))
+
+    def iter_rows(self, entity, where=None, order_by=None, limit=None, offset=0, conn=None, batch_size=1000):
+        table = self.tables[entity]
+        sql, params = self._select_sql(table, where, order_by, limit, offset)
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            while True:
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    break
+                for values in batch:
+                    yield table.decode(values)
+
+    def iter_new_rows(self, entity, after_id=0, conn=None, batch_size=1000):
+        # (id, row) for rows inserted after `after_id`, in id order: lets
+        # caches and rollups catch up on appends without rescanning
+        table = self.tables[entity]
+        cols = ", ".join(["id"] + [table.columns[h] for h in table.headers])
+        sql = f"SELECT {cols} FROM {table.name} WHERE id > {self.placeholder} ORDER BY id"
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(sql, [after_id])
+            while True:
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    break
+                for values in batch:
+                    yield values[0], table.decode(values[1:])
+
+    def get(self, entity, key, conn=None):
+        table = self.tables[entity]
+        if table.key is None:
+            raise ValueError(f"{entity} has no unique key column")
+        rows = self.query(entity, where={table.key: key}, limit=1, conn=conn)
+        return rows[0] if rows else None
+
+    def version(self, entity, where=None, conn=None):
+        # (row count, highest id) of the matching rows: a cheap fingerprint
+        # that changes on every insert or delete, since ids are never reused
+        table = self.tables[entity]
+        where_sql, params = self._where_sql(table, where)
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT COUNT(*), MAX(id) FROM {table.name}{where_sql}", params)
+            count, max_id = cur.fetchone()
+            return count, max_id or 0
+
+    def sum(self, entity, header, where=None, conn=None):
+        table = self.tables[entity]
+        where_sql, params = self._where_sql(table, where)
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT SUM({table.columns[header]}) FROM {table.name}{where_sql}", params)
+            return cur.fetchone()[0] or 0
+
+    def max(self, entity, header, where=None, conn=None):
+        table = self.tables[entity]
+        where_sql, params = self._where_sql(table, where)
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT MAX({table.columns[header]}) FROM {table.name}{where_sql}", params)
+            return cur.fetchone()[0]
+
+    def count(self, entity, where=None, conn=None):
+        table = self.tables[entity]
+        where_sql, params = self._where_sql(table, where)
+        with self._connection(conn) as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT COUNT(*) FROM {table.name}{where_sql}", params)
+            return cur.fetchone()[0]
+
+
+# -------------------------------------------------------
+# SQLite (local use)
+# -------------------------------------------------------
+class SQLiteStore(ERPStore):
+    placeholder = "?"
+    column_types = {TEXT: "TEXT", NUMBER: "REAL", INTEGER: "INTEGER", DATE: "TEXT", DATETIME: "TEXT"}
+    id_column = "id INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def __init__(self, path="factory_erp.db", pool_size=5):
+        ERPStore.__init__(self)
+        if path == ":memory:":
+            # Every connection would get its own private in-memory DB
+            pool_size = 1
+        self.path = path
+        self._pool = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _existing_columns(self, cur):
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = [name for (name,) in cur.fetchall()]
+        existing = {}
+        for name in tables:
+            cur.execute(f'PRAGMA table_info("{name}")')
+            existing[name] = {row[1] for row in cur.fetchall()}
+        return existing
+
+    def _add_column(self, cur, table, column, col_type):
+        # No ADD COLUMN IF NOT EXISTS in SQLite
+        try:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e):
+                raise
+            return False
+        return True
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn):
+        self._pool.put(conn)
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all = []
+
+
+# -------------------------------------------------------
+# PostgreSQL (production)
+# -------------------------------------------------------
+class PostgresStore(ERPStore):
+    placeholder = "%s"
+    column_types = {TEXT: "TEXT", NUMBER: "DOUBLE PRECISION", INTEGER: "BIGINT", DATE: "DATE",
+                    DATETIME: "TIMESTAMP"}
+    id_column = "id BIGSERIAL PRIMARY KEY"
+    schema_lock_id = 0x45525053  # "ERPS"
+
+    def __init__(self, dsn, minconn=1, maxconn=10):
+        from psycopg2.pool import ThreadedConnectionPool
+
+        ERPStore.__init__(self)
+        self._pool = ThreadedConnectionPool(minconn, maxconn, dsn)
+        # ThreadedConnectionPool raises instead of waiting when exhausted
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def _existing_columns(self, cur):
+        cur.execute("SELECT table_name, column_name FROM information_schema.columns "
+                    "WHERE table_schema = current_schema()")
+        existing = {}
+        for table, column in cur.fetchall():
+            existing.setdefault(table, set()).add(column)
+        return existing
+
+    def _lock_schema(self, cur):
+        # Concurrent CREATE TABLE IF NOT EXISTS can still collide in the
+        # catalog, so starters queue on a transaction-scoped advisory lock
+        # and each reads the catalog only once it holds it
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (self.schema_lock_id,))
+
+    def _add_column(self, cur, table, column, col_type):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {col_type}")
+        return True
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            return self._pool.getconn()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn):
+        self._pool.putconn(conn)
+        self._slots.release()
+
+    def close(self):
+        self._pool.closeall()
+
+
+def open_store(url="sqlite:///factory_erp.db", create=True, **pool_options):
+    # sqlite:///relative.db, sqlite:////abs/path.db, sqlite:///:memory:,
+    # or any postgresql:// / postgres:// DSN understood by psycopg2
+    if url.startswith("sqlite:///"):
+        store = SQLiteStore(url[len("sqlite:///"):], **pool_options)
+    elif url.startswith(("postgresql://", "postgres://")):
+        store = PostgresStore(url, **pool_options)
+    else:
+        raise ValueError(f"Unsupported store URL: {url!r}")
+    if create:
+        store.create_schema()
+    return store
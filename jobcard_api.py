@@ -0,0 +1,367 @@
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+from io import BytesIO
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from jobcard_pdf import (
+    ITEM_COLUMNS, MATERIAL_COLUMNS, GRN_COLUMNS, TABLE_SCHEMAS, NUMBER,
+    render_jobcard, section_rows, jobcard_pdf_args, parse_numbers
+)
+from jobcard_cache import RenderCache, jobcard_cache_key
+from jobcard_repo import SECTIONS
+from batch_jobcards import jobcard_file_name
+
+# -------------------------------------------------------
+# Job-card HTTP service
+#
+#   python jobcard_api.py --port 8000 --workers 4 --queue 32
+#
+#   POST /jobcards   job-card JSON -> application/pdf
+#   GET  /metrics    queue depth, in-flight renders, latency percentiles
+#   GET  /health
+#
+# The JSON carries the fields the Streamlit form collects (see
+# RECORD_FIELDS). Renders run in a bounded process pool; once `workers`
+# are busy and `queue` more are waiting, new requests get 503 with
+# Retry-After instead of piling up. LocalClient drives the same app
+# in-process, without a server or socket, for tests and scripts.
+# -------------------------------------------------------
+
+TEXT_FIELDS = [
+    "company_name", "company_address",
+    "vendor_id", "vendor_company", "vendor_person", "vendor_mobile", "vendor_gst", "vendor_address",
+    "job_no", "job_date", "dispatch_location", "expected_date",
+    "tolerance", "surface_finish", "hardness",
+]
+# field -> form columns for the three table sections
+TABLE_FIELDS = {
+    "items": ITEM_COLUMNS,
+    "materials": MATERIAL_COLUMNS,
+    "grn_entries": GRN_COLUMNS,
+}
+# Collected by the form but not printed: the operation checklist and
+# machine details ({"type", "cycle_time", "rpm", "feed", "gear_setup"})
+OTHER_FIELDS = ["thread_check", "operations", "machine", "logo"]
+RECORD_FIELDS = TEXT_FIELDS + list(TABLE_FIELDS) + OTHER_FIELDS
+
+LATENCY_WINDOW = 1000
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def _parse_numbers(field, rows, columns):
+    # Number columns must hold numbers (or be blank); returns the rows with
+    # them parsed, so "1,000" is stored and rendered as 1000
+    rows = [list(r) for r in rows or []]
+    for i, column in enumerate(columns):
+        if dict(TABLE_SCHEMAS[field])[column] != NUMBER:
+            continue
+        values = pd.Series([r[i] if i < len(r) else None for r in rows], dtype=object)
+        given = values.notna() & values.astype(str).str.strip().ne("")
+        numbers = parse_numbers(values)
+        bad = given & numbers.isna()
+        if bad.any():
+            line = int(bad.idxmax()) + 1
+            raise InvalidRecord(f"{field} row {line}: {column} must be a number, got {values[line - 1]!r}")
+        for row, number, is_given in zip(rows, numbers, given):
+            if is_given:
+                row[i] = number
+    return rows
+
+
+def parse_record(payload):
+    # Validates a request body and returns (record, logo bytes)
+    if not isinstance(payload, dict):
+        raise InvalidRecord("Body must be a JSON object")
+    unknown = sorted(set(payload) - set(RECORD_FIELDS))
+    if unknown:
+        raise InvalidRecord(f"Unknown fields: {', '.join(unknown)}")
+    if not payload.get("job_no"):
+        raise InvalidRecord("job_no is required")
+
+    record = {}
+    for field in TEXT_FIELDS:
+        value = payload.get(field)
+        if value is not None and not isinstance(value, (str, int, float)):
+            raise InvalidRecord(f"{field} must be a string")
+        record[field] = "" if value is None else str(value)
+    for field, columns in TABLE_FIELDS.items():
+        rows = payload.get(field) or []
+        if not isinstance(rows, list) or not all(isinstance(r, (list, dict)) for r in rows):
+            raise InvalidRecord(f"{field} must be a list of rows (lists or objects)")
+        for row in rows:
+            if isinstance(row, dict) and set(row) - set(columns):
+                raise InvalidRecord(f"{field} rows take the columns {columns}")
+        record[field] = _parse_numbers(field, section_rows(rows, columns), columns)
+    thread_check = payload.get("thread_check", False)
+    if not isinstance(thread_check, bool):
+        raise InvalidRecord("thread_check must be true or false")
+    record["thread_check"] = thread_check
+    operations = payload.get("operations") or []
+    if not isinstance(operations, list) or not all(isinstance(op, str) for op in operations):
+        raise InvalidRecord("operations must be a list of strings")
+    record["operations"] = operations
+    machine = payload.get("machine") or {}
+    if not isinstance(machine, dict):
+        raise InvalidRecord("machine must be an object")
+    record["machine"] = machine
+
+    logo = None
+    if payload.get("logo"):
+        try:
+            logo = base64.b64decode(payload["logo"], validate=True)
+            # Decoded here so a bad image is a 422, not a failed render
+            with Image.open(BytesIO(logo)) as img:
+                img.load()
+        except (ValueError, TypeError, OSError):
+            raise InvalidRecord("logo must be base64-encoded image data")
+    return record, logo
+
+
+def _render(record, logo):
+    # Module-level so process-pool workers can unpickle it
+    return render_jobcard(record, logo)
+
+
+class RenderPool:
+    # Bounded render executor with admission control and metrics
+    def __init__(self, workers=4, queue=32, processes=True):
+        self.workers = workers
+        self.capacity = workers + queue
+        pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self.executor = pool_class(max_workers=workers)
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def try_acquire(self):
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            return False
+        self.pending += 1
+        return True
+
+    def release(self):
+        self.pending -= 1
+
+    async def render(self, record, logo):
+        # Caller holds a slot from try_acquire() until this returns
+        start = time.perf_counter()
+        try:
+            pdf = await asyncio.get_running_loop().run_in_executor(self.executor, _render, record, logo)
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        self.latencies.append(time.perf_counter() - start)
+        return pdf
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+
+        def pct(p):
+            if not latencies:
+                return None
+            return round(latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)] * 1e3, 1)
+
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": min(self.pending, self.workers),
+            "queue_depth": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "latency_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99), "window": len(latencies)},
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def save_jobcard(repository, record):
+    # Stores the card and replaces its line items in the ERP store, all in
+    # one transaction. The card row is written first, which locks it, so
+    # two saves of the same job_no run one after the other.
+    job_no = record["job_no"]
+    with repository.store.transaction() as conn:
+        repository.save_card(job_no, conn=conn)
+        for section in SECTIONS:
+            repository.clear(job_no, section, conn=conn)
+            repository.add_rows(job_no, section, record[section], conn=conn)
+
+
+def pdf_response(record, pdf):
+    return Response(pdf, media_type="application/pdf",
+                    headers={"Content-Disposition": f'inline; filename="{jobcard_file_name(record, 0)}"'})
+
+
+def create_app(workers=4, queue=32, processes=True, repository=None, cache=None):
+    # With a JobCardRepository, every card that renders is also saved to
+    # the ERP store. With a RenderCache, unchanged cards
+    # are answered from it without taking a render slot.
+    pool = RenderPool(workers, queue, processes)
+
+    async def create_jobcard(request):
+        try:
+            record, logo = parse_record(await request.json())
+        except json.JSONDecodeError:
+            return JSONResponse({"error": "Body is not valid JSON"}, status_code=400)
+        except InvalidRecord as exc:
+            return JSONResponse({"error": str(exc)}, status_code=422)
+
+        key = None
+        pdf = None
+        if cache is not None:
+            # Building the frames and hashing them is CPU work: keep it off
+            # the event loop
+            key = await asyncio.to_thread(lambda: jobcard_cache_key(**jobcard_pdf_args(record, logo)))
+            pdf = cache.get(key)
+
+        if pdf is None:
+            if not pool.try_acquire():
+                return JSONResponse({"error": "Render queue is full"}, status_code=503,
+                                    headers={"Retry-After": "1"})
+            try:
+                pdf = await pool.render(record, logo)
+            finally:
+                pool.release()
+            if key is not None:
+                cache.put(key, pdf)
+        # Saved only once the card has rendered
+        if repository is not None:
+            await asyncio.to_thread(save_jobcard, repository, record)
+        return pdf_response(record, pdf)
+
+    async def metrics(request):
+        metrics = pool.metrics()
+        if cache is not None:
+            metrics["cache"] = cache.stats()
+        return JSONResponse(metrics)
+
+    async def health(request):
+        return JSONResponse({"status": "ok"})
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        pool.close()
+
+    app = Starlette(routes=[
+        Route("/jobcards", create_jobcard, methods=["POST"]),
+        Route("/metrics", metrics),
+        Route("/health", health),
+    ], lifespan=lifespan)
+    app.state.pool = pool
+    return app
+
+
+# -------------------------------------------------------
+# In-process stand-in client
+# -------------------------------------------------------
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class LocalClient:
+    # Calls the ASGI app directly on a private event loop:
+    #   client = LocalClient(create_app(processes=False))
+    #   status, headers, body = client.post("/jobcards", {...})
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+
+    def request(self, method, path, payload=None):
+        return self.loop.run_until_complete(self.arequest(method, path, payload))
+
+    def post(self, path, payload):
+        return self.request("POST", path, payload)
+
+    def get(self, path):
+        return self.request("GET", path)
+
+    async def arequest(self, method, path, payload=None):
+        # Coroutine form, for driving many concurrent requests with gather()
+        body = b"" if payload is None else json.dumps(payload, default=_json_default).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "", "server": ("local", 80), "client": ("local", 0),
+            "headers": [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode())],
+        }
+        sent = False
+        status, headers, chunks = None, {}, []
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers.update((k.decode(), v.decode()) for k, v in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, headers, b"".join(chunks)
+
+    def close(self):
+        self.app.state.pool.close()
+        self.loop.close()
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve job-card creation and rendering over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="render processes (default: %(default)s)")
+    parser.add_argument("--queue", type=int, default=32,
+                        help="renders allowed to wait before returning 503 (default: %(default)s)")
+    parser.add_argument("--store", default=None,
+                        help="also save cards to this ERP store URL, e.g. sqlite:///factory_erp.db")
+    parser.add_argument("--cache-mb", type=int, default=64, help="in-memory PDF cache size (0 disables)")
+    parser.add_argument("--cache-dir", default=None, help="on-disk PDF cache directory")
+    parser.add_argument("--cache-disk-mb", type=int, default=1024, help="on-disk PDF cache size")
+    args = parser.parse_args(argv)
+
+    repository = None
+    if args.store:
+        from jobcard_repo import open_repository
+        repository = open_repository(args.store)
+    cache = None
+    if args.cache_mb or args.cache_dir:
+        cache = RenderCache(args.cache_mb << 20, args.cache_dir, args.cache_disk_mb << 20)
+    app = create_app(args.workers, args.queue, repository=repository, cache=cache)
+    uvicorn.run(app, host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
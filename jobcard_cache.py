@@ -0,0 +1,209 @@
+import os
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from jobcard_pdf import RENDER_VERSION, generate_jobcard_pdf, read_logo_bytes
+
+# -------------------------------------------------------
+# Rendered-PDF cache
+#
+# PDFs are stored under a SHA-256 of every generate_jobcard_pdf input that
+# affects the output: the form fields, logo bytes, QR payload and each
+# table's columns, dtypes and cell values -- plus jobcard_pdf.RENDER_VERSION,
+# so a layout change misses entries cached before it. An unchanged card
+# therefore hits whatever the caller (Streamlit rerun, dispatch re-print,
+# HTTP client).
+#
+#   cache = RenderCache(memory_bytes=64 << 20, disk_dir="render_cache", disk_bytes=1 << 30)
+#   pdf = cache.render(**generate_jobcard_pdf_kwargs)
+#
+# Two tiers, both bounded by size: an in-process LRU and an optional
+# directory of <key>.pdf files. Disk hits are promoted to memory; when the
+# directory outgrows its budget the least recently used files go first.
+# -------------------------------------------------------
+
+# Inputs that do not change the rendered document
+_NOT_HASHED = {"context", "on_stage", "output"}
+_SIGNATURE = inspect.signature(generate_jobcard_pdf)
+
+
+def _feed(h, value):
+    if isinstance(value, pd.DataFrame):
+        h.update(b"D")
+        h.update(repr([(str(c), str(t)) for c, t in value.dtypes.items()]).encode())
+        h.update(len(value).to_bytes(8, "little"))
+        if len(value.columns):
+            h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        h.update(b"B" + len(value).to_bytes(8, "little"))
+        h.update(value)
+    else:
+        h.update(f"{type(value).__name__}:{value!r}".encode())
+    h.update(b"\0")
+
+
+def jobcard_cache_key(*args, **kwargs):
+    # Stable across processes and restarts for the same inputs. The logo is
+    # hashed by content, whether given as a path, bytes or a file object.
+    bound = _SIGNATURE.bind(*args, **kwargs)
+    bound.apply_defaults()
+    h = hashlib.sha256()
+    h.update(f"render={RENDER_VERSION}\0".encode())
+    for name, value in bound.arguments.items():
+        if name in _NOT_HASHED:
+            continue
+        if name == "logo_file":
+            value = read_logo_bytes(value)
+        h.update(name.encode() + b"=")
+        _feed(h, value)
+    return h.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, memory_bytes=64 << 20, disk_dir=None, disk_bytes=1 << 30):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    # ---------------------------------------------------
+    # Lookup
+    # ---------------------------------------------------
+    def get(self, key):
+        with self._lock:
+            pdf = self._memory.get(key)
+            if pdf is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return pdf
+        pdf = self._disk_get(key)
+        with self._lock:
+            if pdf is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, pdf)
+        return pdf
+
+    def put(self, key, pdf):
+        with self._lock:
+            self._memory_put(key, pdf)
+        if self.disk_dir:
+            self._disk_put(key, pdf)
+
+    def render(self, *args, **kwargs):
+        # Same arguments as generate_jobcard_pdf; returns the PDF bytes, or
+        # writes them to `output` when one is given
+        output = kwargs.pop("output", None)
+        bound = _SIGNATURE.bind(*args, **kwargs)
+        if "logo_file" in bound.arguments:
+            # Read once: file objects cannot be read again for the render
+            bound.arguments["logo_file"] = read_logo_bytes(bound.arguments["logo_file"])
+        key = jobcard_cache_key(*bound.args, **bound.kwargs)
+        pdf = self.get(key)
+        if pdf is None:
+            pdf = generate_jobcard_pdf(*bound.args, **bound.kwargs)
+            self.put(key, pdf)
+        if output is None:
+            return pdf
+        if hasattr(output, "write"):
+            output.write(pdf)
+        else:
+            with open(output, "wb") as f:
+                f.write(pdf)
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "memory_entries": len(self._memory), "memory_bytes": self._memory_used,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+        for path, _, _ in self._disk_entries():
+            os.remove(path)
+
+    # ---------------------------------------------------
+    # Memory tier
+    # ---------------------------------------------------
+    def _memory_put(self, key, pdf):
+        if len(pdf) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old)
+        self._memory[key] = pdf
+        self._memory_used += len(pdf)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    # ---------------------------------------------------
+    # Disk tier
+    # ---------------------------------------------------
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pdf")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                pdf = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+        except FileNotFoundError:
+            return None
+        return pdf
+
+    def _disk_put(self, key, pdf):
+        # Write-then-rename so concurrent readers never see a partial file
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp, path)
+        self._disk_evict()
+
+    def _disk_entries(self):
+        if not self.disk_dir:
+            return []
+        entries = []
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pdf"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((entry.path, st.st_mtime, st.st_size))
+        return entries
+
+    def _disk_evict(self):
+        entries = self._disk_entries()
+        used = sum(size for _, _, size in entries)
+        if used <= self.disk_bytes:
+            return
+        for path, _, size in sorted(entries, key=lambda e: e[1]):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            used -= size
+            if used <= self.disk_bytes:
+                break
@@ -0,0 +1,112 @@
+import os
+from collections import namedtuple
+from datetime import date, datetime
+
+import pandas as pd
+
+from ERP_database import ERP_SCHEMA, NUMBER, INTEGER
+from jobcard_repo import SECTIONS
+from jobcard_schema import parse_numbers
+
+# -------------------------------------------------------
+# Bulk import of job-card rows from CSV / Excel
+#
+# A file holds rows for one section (items, materials or GRN) under the
+# same column headers as the form; header matching ignores case and
+# surrounding spaces. The whole file is parsed and validated column by
+# column: numeric columns (per ERP_SCHEMA) are parsed with parse_numbers
+# (commas only as digit grouping) and non-blank values that fail are reported with their line number. Unknown
+# columns are ignored and reported; missing ones are left blank.
+# -------------------------------------------------------
+
+ImportResult = namedtuple("ImportResult", ["rows", "errors", "ignored_columns"])
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+MAX_REPORTED_ERRORS = 100
+
+
+def _file_name(source, name=None):
+    if name:
+        return name
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", "") or ""
+
+
+def _excel_cell(value):
+    if isinstance(value, datetime) and value == datetime.combine(value.date(), datetime.min.time()):
+        return value.date().isoformat()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def read_table(source, name=None):
+    # `source` is a path or file object (e.g. a Streamlit upload); `name`
+    # overrides the file name used to tell CSV from Excel
+    if _file_name(source, name).lower().endswith(EXCEL_EXTENSIONS):
+        # Cells keep their Excel types; dates are written the way the form
+        # takes them
+        df = pd.read_excel(source, dtype=object, engine="openpyxl").map(_excel_cell)
+    else:
+        # Blank lines stay as empty rows so reported line numbers match the file
+        df = pd.read_csv(source, dtype=str, keep_default_na=False, skipinitialspace=True,
+                         skip_blank_lines=False)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def numeric_columns(section):
+    entity, columns = SECTIONS[section]
+    types = dict(ERP_SCHEMA[entity]["columns"])
+    return [c for c in columns if types.get(c) in (NUMBER, INTEGER)]
+
+
+def parse_section_rows(source, section, name=None):
+    # Returns ImportResult(rows, errors, ignored_columns): `rows` is a
+    # DataFrame of the valid rows in form column order (blanks as None),
+    # `errors` lists (line, column, value) for values that are not numbers
+    _, columns = SECTIONS[section]
+    raw = read_table(source, name)
+
+    wanted = {c.casefold(): c for c in columns}
+    rename = {c: wanted[c.casefold()] for c in raw.columns if c.casefold() in wanted}
+    ignored = [c for c in raw.columns if c not in rename]
+    if not rename:
+        raise ValueError(f"None of the columns {columns} found in the file")
+    raw = raw[list(rename)].rename(columns=rename)
+    raw = raw.loc[:, ~raw.columns.duplicated()]
+
+    # Everything as trimmed text first; "" means blank
+    text = raw.astype(object).where(raw.notna(), "").astype(str).apply(lambda s: s.str.strip())
+    text = text.reindex(columns=columns, fill_value="")
+    blank = text.eq("")
+    keep = ~blank.all(axis=1)
+    text, blank = text[keep], blank[keep]
+
+    rows = text.astype(object).where(~blank, None)
+    bad = pd.Series(False, index=text.index)
+    errors = []
+    for column in numeric_columns(section):
+        values = parse_numbers(text[column])
+        invalid = values.isna() & ~blank[column]
+        if invalid.any():
+            bad |= invalid
+            lines = invalid[invalid].index[:MAX_REPORTED_ERRORS]
+            # +2: header row, and 1-based lines as a spreadsheet shows them
+            errors.extend((int(i) + 2, column, text.at[i, column]) for i in lines)
+        rows[column] = values.astype(object).where(values.notna(), None)
+
+    errors.sort()
+    return ImportResult(rows[~bad].reset_index(drop=True), errors, ignored)
+
+
+def import_section_rows(repo, job_no, section, source, name=None, skip_invalid=False):
+    # Parses the file and appends its rows to the job card in one batch.
+    # With errors nothing is imported unless `skip_invalid` is set, in which
+    # case only the valid rows are. Returns (rows added, ImportResult).
+    result = parse_section_rows(source, section, name)
+    if result.errors and not skip_invalid:
+        return 0, result
+    added = repo.add_rows(job_no, section, result.rows.itertuples(index=False, name=None))
+    return added, result
@@ -0,0 +1,511 @@
+import copy
+import time
+import qrcode
+import numpy as np
+import pandas as pd
+from io import BytesIO
+from functools import lru_cache, partial
+from PIL import Image as PILImage
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, Flowable
+)
+from reportlab.graphics.shapes import Drawing, Rect, Image as DrawingImage
+from reportlab.graphics.barcode import qr, code128
+from reportlab.pdfgen.canvas import Canvas
+from jobcard_schema import (  # re-exported: callers import these from here too
+    TEXT, NUMBER, CATEGORY, TABLE_SCHEMAS, ITEM_COLUMNS, MATERIAL_COLUMNS, GRN_COLUMNS,
+    section_rows, jobcard_qr_text, rows_to_df, apply_schema, jobcard_totals,
+    summarize_totals, format_number, parse_numbers,
+)
+
+# Part of every render-cache key (jobcard_cache): bump it whenever the
+# layout, styles or fonts change so PDFs cached by older code are not served.
+RENDER_VERSION = 1
+
+# -------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------
+# QR/barcode artifacts are pure functions of their payload, so repeated
+# reruns and re-exports of an unchanged card hit these caches instead of
+# encoding again. Bounded so long-running servers don't grow without limit.
+CODE_CACHE_SIZE = 256
+
+@lru_cache(maxsize=CODE_CACHE_SIZE)
+def _qr_png(data, box_size):
+    qr = qrcode.QRCode(box_size=box_size)
+    qr.add_data(data)
+    qr.make()
+    img = qr.make_image(fill_color="black", back_color="white")
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+def make_qr_bytes(data, box_size=4):
+    # (PNG bytes, image). Only the immutable bytes are cached; every caller
+    # gets an image of its own to modify.
+    png = _qr_png(data, box_size)
+    return png, PILImage.open(BytesIO(png))
+
+@lru_cache(maxsize=CODE_CACHE_SIZE)
+def qr_modules(data, size=100):
+    # Dark module rectangles of the QR, from ReportLab's QrCodeWidget
+    widget = qr.QrCodeWidget(data, barLevel="M", barWidth=size, barHeight=size)
+    return tuple((r.x, r.y, r.width, r.height)
+                 for r in widget.draw().contents if r.fillColor is not None)
+
+class QrFlowable(Flowable):
+    # Vector QR for the PDF: no PNG encode/decode round-trip, and the
+    # modules are filled as a single path instead of walking ~300 drawing
+    # nodes.
+    def __init__(self, data, size=100):
+        Flowable.__init__(self)
+        self.width = self.height = size
+        self._modules = qr_modules(data, size)
+
+    def draw(self):
+        path = self.canv.beginPath()
+        for x, y, w, h in self._modules:
+            path.rect(x, y, w, h)
+        self.canv.setFillColor(colors.black)
+        self.canv.drawPath(path, stroke=0, fill=1)
+
+# Flowables are built per document: drawOn() sets and deletes .canv on the
+# instance, so one shared between concurrent renders breaks both. Only the
+# encoded data above is cached.
+def qr_flowable(data, size=100):
+    return QrFlowable(data, size)
+
+@lru_cache(maxsize=CODE_CACHE_SIZE)
+def _code128_prototype(value, bar_height, bar_width):
+    return code128.Code128(value, barHeight=bar_height, barWidth=bar_width)
+
+def code128_barcode(value, bar_height=40, bar_width=1.2):
+    # Shallow copy: shares the (read-only) encoded bars, not the canvas
+    return copy.copy(_code128_prototype(value, bar_height, bar_width))
+
+def read_logo_bytes(logo_file):
+    # Accepts a path, raw bytes or any file-like object (e.g. a Streamlit upload)
+    if logo_file is None:
+        return None
+    if isinstance(logo_file, (bytes, bytearray)):
+        return bytes(logo_file)
+    if isinstance(logo_file, str):
+        with open(logo_file, "rb") as f:
+            return f.read()
+    if hasattr(logo_file, "getvalue"):
+        return logo_file.getvalue()
+    logo_file.seek(0)
+    return logo_file.read()
+
+
+# -------------------------------------------------------
+# LONG TABLES
+# -------------------------------------------------------
+# ReportLab re-measures everything left in a Table each time it splits
+# one across a page, so a single table of thousands of rows lays out in
+# quadratic time. Past TABLE_CHUNK_ROWS rows a section becomes a run of
+# tables of that many rows, each with its own header row, laid out with
+# column widths measured once over the whole section.
+TABLE_CHUNK_ROWS = 200
+TABLE_FONT_SIZE = 10
+TABLE_PADDING = 12
+
+def _cell_width(value, font):
+    if value is None:
+        return 0
+    return max(stringWidth(line, font, TABLE_FONT_SIZE) for line in str(value).split("\n"))
+
+def display_column(series):
+    # Cell values for one column: numbers without a trailing ".0", blanks
+    # as "", computed for the whole column at once
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy(dtype=float)
+        text = series.astype(str).to_numpy(dtype=object)
+        whole = np.isfinite(values) & (values == np.floor(values))
+        text[whole] = values[whole].astype(np.int64).astype(str)
+        text[np.isnan(values)] = ""
+        return text
+    return series.astype(object).to_numpy()
+
+def grid_column_widths(header, columns):
+    # What Table would compute for each column, over every row at once
+    widths = []
+    for name, values in zip(header, columns):
+        width = _cell_width(name, "Helvetica-Bold")
+        for value in pd.unique(values):
+            width = max(width, _cell_width(value, "Helvetica"))
+        widths.append(width + TABLE_PADDING)
+    return widths
+
+def grid_tables(df, style, chunk_rows=TABLE_CHUNK_ROWS):
+    # Column arrays are zipped into row tuples (per chunk for long tables),
+    # so no full-table list of lists is built
+    header = list(df.columns)
+    columns = [display_column(df[c]) for c in header]
+    if not chunk_rows or len(df) <= chunk_rows:
+        return [Table([header] + list(zip(*columns)), style=style, repeatRows=1)]
+    widths = grid_column_widths(header, columns)
+    return [
+        Table([header] + list(zip(*(col[start:start + chunk_rows] for col in columns))),
+              colWidths=widths, style=style, repeatRows=1)
+        for start in range(0, len(df), chunk_rows)
+    ]
+
+
+# -------------------------------------------------------
+# RENDER CONTEXT (styles + static header, built once per template)
+# -------------------------------------------------------
+class RenderContext:
+    def __init__(self, logo_bytes=None):
+        self.styles = getSampleStyleSheet()
+
+        self.header_style = ParagraphStyle(
+            "header",
+            fontSize=18,
+            leading=22,
+            alignment=1,
+            textColor=colors.HexColor("#0A284B"),
+        )
+
+        self.top_table_style = TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP")])
+
+        self.summary_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#DCE6F2")),
+            ("BOX", (0, 0), (-1, -1), 1, colors.HexColor("#003366")),
+            ("INNERGRID", (0, 0), (-1, -1), 0.2, colors.gray),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")
+        ])
+
+        # Shared by the items, materials and GRN tables
+        self.grid_table_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A284B")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.gray),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")
+        ])
+
+        self.signature_style = TableStyle([
+            ("ALIGN", (0, 0), (-1, 1), "CENTER")
+        ])
+
+        # The decoded image is shared; the Drawing around it is not (it is
+        # a flowable, and drawing one mutates it), see logo_drawing()
+        self.logo_image = self._decode_logo(logo_bytes) if logo_bytes else None
+
+    @staticmethod
+    def _decode_logo(logo_bytes):
+        img = PILImage.open(BytesIO(logo_bytes))
+        img.load()
+        return img
+
+    def logo_drawing(self):
+        # A new framed logo per document, or None without a logo
+        if self.logo_image is None:
+            return None
+        # Drawings only take graphics shapes, not platypus flowables
+        d = Drawing(100, 100)
+        d.add(Rect(0, 0, 90, 90, strokeColor=colors.HexColor("#003366"),
+                    fillColor=None, strokeWidth=2))
+        d.add(DrawingImage(5, 5, 80, 80, self.logo_image))
+        d.hAlign = "LEFT"
+        return d
+
+
+@lru_cache(maxsize=16)
+def get_render_context(logo_bytes=None):
+    # One context per distinct logo; everything else in it is logo-independent
+    return RenderContext(logo_bytes)
+
+
+# -------------------------------------------------------
+# STAGE TIMING (optional per-stage hooks for metrics/benchmarks)
+# -------------------------------------------------------
+class StageTimes:
+    def __init__(self):
+        self.times = {}
+        self._last = time.perf_counter()
+
+    def add(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def lap(self, name, exclude=()):
+        # Time since the previous lap, minus stages reported from inside it
+        now = time.perf_counter()
+        elapsed = now - self._last - sum(self.times.get(n, 0.0) for n in exclude)
+        self.add(name, elapsed)
+        self._last = now
+
+    def report(self, on_stage):
+        if on_stage is not None:
+            for name, seconds in self.times.items():
+                on_stage(name, seconds)
+
+
+# -------------------------------------------------------
+# PAGE NUMBERING FUNCTION
+# -------------------------------------------------------
+class NumberedCanvas(Canvas):
+    # "Page X of Y" without snapshotting canvas state: each page draws a
+    # named form XObject that is only defined in save(), once Y is known.
+    # Memory still grows with the page count, since ReportLab keeps every
+    # finished page until save(); numbering adds one small form per page on
+    # top of that (about 450 bytes of output each). See
+    # bench_page_numbering.py.
+    def __init__(self, *args, **kwargs):
+        self._on_stage = kwargs.pop("on_stage", None)
+        Canvas.__init__(self, *args, **kwargs)
+
+    def showPage(self):
+        self.doForm(self._page_number_form(self._pageNumber))
+        Canvas.showPage(self)
+
+    def save(self):
+        start = time.perf_counter()
+        num_pages = self._pageNumber - 1
+        for page in range(1, num_pages + 1):
+            self.beginForm(self._page_number_form(page))
+            self.draw_page_number(page, num_pages)
+            self.endForm()
+        numbered = time.perf_counter()
+        Canvas.save(self)
+        if self._on_stage is not None:
+            self._on_stage("page_numbering", numbered - start)
+            self._on_stage("write", time.perf_counter() - numbered)
+
+    @staticmethod
+    def _page_number_form(page):
+        return f"PageNumber{page}"
+
+    def draw_page_number(self, page_number, page_count):
+        self.setFont("Helvetica", 9)
+        self.drawCentredString(300, 20, f"Page {page_number} of {page_count}")
+
+
+# -------------------------------------------------------
+# OUTPUT
+# -------------------------------------------------------
+class _PDFCollector:
+    # Write target for returning the PDF as bytes. ReportLab serializes the
+    # document into one bytes object and writes it in a single call; keeping
+    # that object (instead of copying it into a BytesIO and out again with
+    # getvalue()) saves two copies of the document.
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+        return len(data)
+
+    def getvalue(self):
+        if len(self._chunks) == 1:
+            return bytes(self._chunks[0])
+        return b"".join(self._chunks)
+
+
+# -------------------------------------------------------
+# MAIN PDF GENERATOR FUNCTION
+# -------------------------------------------------------
+def generate_jobcard_pdf(
+    company_name, company_address, logo_file,
+    vendor_id, vendor_company, vendor_person, vendor_mobile, vendor_gst, vendor_address,
+    job_no, job_date, dispatch_location, qr_bytes,
+    items_df, materials_df, grn_df,
+    tolerance, surface_finish, hardness, thread_check,
+    context=None, qr_text=None, on_stage=None, output=None,
+    table_chunk_rows=TABLE_CHUNK_ROWS, totals=None
+):
+    # Pass `qr_text` to draw the QR as vector graphics; `qr_bytes` (a PNG)
+    # is only used when no payload text is given.
+    #
+    # `output` is a file path or any object with write() (open file, HTTP
+    # response, zip member); the PDF is written straight to it and None is
+    # returned. Without it the PDF bytes are returned.
+    #
+    # Tables longer than `table_chunk_rows` are laid out in chunks (see
+    # grid_tables); pass 0 to always build one table per section.
+    #
+    # `totals` (as from jobcard_totals) is printed under the tables; it is
+    # computed from the frames when not given, and left out when they do not
+    # have the job-card columns.
+    #
+    # `on_stage(name, seconds)` is called once per render stage: context
+    # (styles + logo decode), codes (QR/barcode), story (flowables),
+    # layout (platypus wrap/split/draw), page_numbering and write (PDF
+    # serialization). The stages add up to the whole call.
+    stages = StageTimes()
+
+    if context is None:
+        context = get_render_context(read_logo_bytes(logo_file))
+    stages.lap("context")
+
+    sink = _PDFCollector() if output is None else output
+    doc = SimpleDocTemplate(sink, pagesize=A4,
+                            rightMargin=30, leftMargin=30,
+                            topMargin=30, bottomMargin=30)
+
+    styles = context.styles
+    story = []
+
+    # ---------------------------------------------------
+    # HEADER (Logo + Company Info)
+    # ---------------------------------------------------
+    story.append(Spacer(1, 10))
+
+    logo = context.logo_drawing()
+    if logo is not None:
+        story.append(logo)
+
+    story.append(Paragraph(f"<b>{company_name}</b>", context.header_style))
+    story.append(Paragraph(company_address, styles["Normal"]))
+    story.append(Spacer(1, 12))
+
+    # ---------------------------------------------------
+    # QR CODE + BARCODE + JOB INFO
+    # ---------------------------------------------------
+    barcode_value = f"{job_no}-{vendor_id}"
+    barcode = code128_barcode(barcode_value)
+
+    qr_img = None
+    if qr_text:
+        qr_img = qr_flowable(qr_text)
+    elif qr_bytes:
+        qr_img = Image(BytesIO(qr_bytes), width=100, height=100)
+    stages.lap("codes")
+
+    top_row = [
+        Paragraph(
+            f"""
+            <b>Job No:</b> {job_no}<br/>
+            <b>Date:</b> {job_date}<br/>
+            <b>Dispatch:</b> {dispatch_location}
+            """,
+            styles["Normal"]
+        ),
+        qr_img if qr_img else "",
+        barcode,
+    ]
+
+    top_table = Table([top_row], colWidths=[200, 120, 120])
+    top_table.setStyle(context.top_table_style)
+    story.append(top_table)
+    story.append(Spacer(1, 12))
+
+    # ---------------------------------------------------
+    # SUMMARY BOX
+    # ---------------------------------------------------
+    summary = Table([
+        [Paragraph("<b>Quality Summary</b>", styles["Heading4"])],
+        [f"Tolerance: {tolerance}"],
+        [f"Surface Finish: {surface_finish}"],
+        [f"Hardness: {hardness}"],
+        ["Thread Check: GO/NO-GO Required" if thread_check else "Thread: Not Applicable"]
+    ], colWidths=[450])
+
+    summary.setStyle(context.summary_style)
+
+    story.append(summary)
+    story.append(Spacer(1, 14))
+
+    # ---------------------------------------------------
+    # VENDOR DETAILS
+    # ---------------------------------------------------
+    story.append(Paragraph("<b>Vendor Details</b>", styles["Heading4"]))
+    vendor_html = f"""
+        <b>ID:</b> {vendor_id}<br/>
+        <b>Company:</b> {vendor_company}<br/>
+        <b>Contact Person:</b> {vendor_person}<br/>
+        <b>Mobile:</b> {vendor_mobile}<br/>
+        <b>GST:</b> {vendor_gst}<br/>
+        <b>Address:</b> {vendor_address}<br/>
+    """
+    story.append(Paragraph(vendor_html, styles["Normal"]))
+    story.append(Spacer(1, 12))
+
+    # ---------------------------------------------------
+    # ITEMS TABLE
+    # ---------------------------------------------------
+    story.append(Paragraph("<b>Item Details</b>", styles["Heading4"]))
+    story.extend(grid_tables(items_df, context.grid_table_style, table_chunk_rows))
+    story.append(Spacer(1, 14))
+
+    # ---------------------------------------------------
+    # MATERIAL TABLE
+    # ---------------------------------------------------
+    story.append(Paragraph("<b>Material Issued</b>", styles["Heading4"]))
+    story.extend(grid_tables(materials_df, context.grid_table_style, table_chunk_rows))
+    story.append(Spacer(1, 14))
+
+    # ---------------------------------------------------
+    # GRN TABLE
+    # ---------------------------------------------------
+    story.append(Paragraph("<b>Goods Received / QC</b>", styles["Heading4"]))
+    story.extend(grid_tables(grn_df, context.grid_table_style, table_chunk_rows))
+    story.append(Spacer(1, 14))
+
+    # ---------------------------------------------------
+    # TOTALS
+    # ---------------------------------------------------
+    totals = totals or jobcard_totals(items_df, materials_df, grn_df)
+    if totals:
+        story.append(Paragraph("<b>Totals</b>", styles["Heading4"]))
+        totals_table = Table([list(totals), [format_number(v) for v in totals.values()]])
+        totals_table.setStyle(context.grid_table_style)
+        story.append(totals_table)
+        story.append(Spacer(1, 20))
+
+    # ---------------------------------------------------
+    # SIGNATURES
+    # ---------------------------------------------------
+    story.append(Paragraph("<b>Signatures</b>", styles["Heading4"]))
+    sig = Table([
+        ["__________________", "__________________", "__________________"],
+        ["Prepared By", "QC Approved", "Vendor Sign"]
+    ], colWidths=[150, 150, 150])
+    sig.setStyle(context.signature_style)
+    story.append(sig)
+
+    # ---------------------------------------------------
+    # BUILD PDF
+    # ---------------------------------------------------
+    stages.lap("story")
+    doc.build(story, canvasmaker=partial(NumberedCanvas, on_stage=stages.add))
+    stages.lap("layout", exclude=("page_numbering", "write"))
+    stages.report(on_stage)
+
+    if output is None:
+        return sink.getvalue()
+    return None
+
+
+# -------------------------------------------------------
+# RECORD-BASED ENTRY POINT (batch runs, no Streamlit)
+# -------------------------------------------------------
+def jobcard_pdf_args(record, logo_file=None):
+    # `record` holds the same fields the Streamlit form collects; table
+    # sections are plain row lists under "items", "materials", "grn_entries".
+    # Returns the generate_jobcard_pdf keyword arguments for it.
+    job_no = record.get("job_no", "")
+    job_date = record.get("job_date", "")
+    dispatch_location = record.get("dispatch_location", "")
+    vendor_id = record.get("vendor_id", "")
+    return dict(
+        company_name=record.get("company_name", ""), company_address=record.get("company_address", ""),
+        logo_file=logo_file,
+        vendor_id=vendor_id, vendor_company=record.get("vendor_company", ""),
+        vendor_person=record.get("vendor_person", ""), vendor_mobile=record.get("vendor_mobile", ""),
+        vendor_gst=record.get("vendor_gst", ""), vendor_address=record.get("vendor_address", ""),
+        job_no=job_no, job_date=job_date, dispatch_location=dispatch_location, qr_bytes=None,
+        items_df=rows_to_df(section_rows(record.get("items"), ITEM_COLUMNS), ITEM_COLUMNS),
+        materials_df=rows_to_df(section_rows(record.get("materials"), MATERIAL_COLUMNS), MATERIAL_COLUMNS),
+        grn_df=rows_to_df(section_rows(record.get("grn_entries"), GRN_COLUMNS), GRN_COLUMNS),
+        tolerance=record.get("tolerance", ""), surface_finish=record.get("surface_finish", ""),
+        hardness=record.get("hardness", ""), thread_check=record.get("thread_check", False),
+        qr_text=jobcard_qr_text(job_no, job_date, dispatch_location, vendor_id),
+    )
+
+def render_jobcard(record, logo_file=None, on_stage=None, output=None):
+    return generate_jobcard_pdf(**jobcard_pdf_args(record, logo_file), on_stage=on_stage, output=output)
@@ -0,0 +1,99 @@
+import os
+
+from jobcard_schema import ITEM_COLUMNS, MATERIAL_COLUMNS, GRN_COLUMNS, rows_to_df, summarize_totals
+
+# -------------------------------------------------------
+# Server-side job cards
+#
+# Job cards are saved in the ERP store under their Job Card No: one row in
+# "Job Cards" plus numbered line rows per section. The Streamlit app only
+# keeps the card number and the page it is showing; rows are read back a
+# page at a time.
+# -------------------------------------------------------
+STORE_URL = os.environ.get("ERP_STORE_URL", "sqlite:///factory_erp.db")
+
+# section key -> (ERP entity, form/PDF columns)
+SECTIONS = {
+    "items": ("Job Card Items", ITEM_COLUMNS),
+    "materials": ("Job Card Materials", MATERIAL_COLUMNS),
+    "grn_entries": ("Job Card GRN", GRN_COLUMNS),
+}
+
+
+class JobCardRepository:
+    def __init__(self, store):
+        self.store = store
+
+    def save_card(self, job_no, conn=None, **fields):
+        # Creates the "Job Cards" row if needed (as Open) and locks it for
+        # the rest of the transaction, so concurrent writers of one card
+        # queue up. `fields` are extra Job Cards columns (e.g. Product=...,
+        # Status=...) to set; an existing card keeps the others.
+        with self.store._connection(conn) as conn:
+            self.store.upsert("Job Cards", {"Job Card No": job_no, **fields}, conn=conn,
+                              defaults={"Status": "Open"})
+            self.store.lock("Job Cards", job_no, conn)
+
+    def add_rows(self, job_no, section, rows, conn=None):
+        # Appends form rows (lists in column order) and returns how many,
+        # numbered after the highest line while holding the card's lock
+        entity, columns = SECTIONS[section]
+        with self.store._connection(conn) as conn:
+            self.save_card(job_no, conn=conn)
+            start = int(self.store.max(entity, "Line No", where={"Job Card No": job_no}, conn=conn) or 0)
+            records = (
+                {"Job Card No": job_no, "Line No": start + i, **dict(zip(columns, row))}
+                for i, row in enumerate(rows, 1)
+            )
+            return self.store.insert_many(entity, records, conn=conn)
+
+    def clear(self, job_no, section, conn=None):
+        entity, _ = SECTIONS[section]
+        return self.store.delete(entity, where={"Job Card No": job_no}, conn=conn)
+
+    def count_rows(self, job_no, section):
+        entity, _ = SECTIONS[section]
+        return self.store.count(entity, where={"Job Card No": job_no})
+
+    def section_version(self, job_no, section):
+        # Changes whenever rows are added to or cleared from the section
+        entity, _ = SECTIONS[section]
+        return self.store.version(entity, where={"Job Card No": job_no})
+
+    def iter_rows(self, job_no, section, offset=0, limit=None):
+        # Rows as lists in column order, by line number; blanks come back
+        # as "" like the rows the form builds
+        entity, columns = SECTIONS[section]
+        for row in self.store.iter_rows(entity, where={"Job Card No": job_no}, order_by=["Line No"],
+                                        limit=limit, offset=offset):
+            yield ["" if row[c] is None else row[c] for c in columns]
+
+    def page(self, job_no, section, page, page_size=50):
+        # One page (1-based) as a DataFrame indexed by line number
+        _, columns = SECTIONS[section]
+        offset = (page - 1) * page_size
+        df = rows_to_df(list(self.iter_rows(job_no, section, offset, page_size)), columns)
+        df.index = range(offset + 1, offset + 1 + len(df))
+        return df
+
+    def totals(self, job_no):
+        # Same figures as jobcard_pdf.jobcard_totals, summed by the store
+        where = {"Job Card No": job_no}
+        return summarize_totals({
+            "Item Qty": self.store.sum("Job Card Items", "Qty", where),
+            "Material Weight": self.store.sum("Job Card Materials", "Weight", where),
+            "Material Qty": self.store.sum("Job Card Materials", "Qty", where),
+            "Qty Received": self.store.sum("Job Card GRN", "Qty Received", where),
+            "OK Qty": self.store.sum("Job Card GRN", "OK Qty", where),
+            "Rejected Qty": self.store.sum("Job Card GRN", "Rejected Qty", where),
+        })
+
+    def section_df(self, job_no, section):
+        _, columns = SECTIONS[section]
+        return rows_to_df(list(self.iter_rows(job_no, section)), columns)
+
+
+def open_repository(url=STORE_URL):
+    from erp_store import open_store
+
+    return JobCardRepository(open_store(url))
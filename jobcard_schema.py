@@ -0,0 +1,133 @@
+import math
+
+# -------------------------------------------------------
+# TABLE SCHEMAS (shared by the Streamlit form and batch runs)
+# -------------------------------------------------------
+# Column types for the three job-card tables: text stays object with ""
+# for blanks, number is float64 (NaN for blanks) so totals are plain
+# column sums, category is for short repeated codes.
+#
+# Kept free of pandas and ReportLab at import time: the form imports this
+# on every cold start, and only the DataFrame helpers below need pandas.
+TEXT = "text"
+NUMBER = "number"
+CATEGORY = "category"
+
+TABLE_SCHEMAS = {
+    "items": [("Description", TEXT), ("Drawing No", TEXT), ("Drawing Link", TEXT),
+              ("Grade", CATEGORY), ("Qty", NUMBER), ("UOM", CATEGORY)],
+    "materials": [("Raw Material", TEXT), ("Heat No", TEXT), ("Dia/Size", TEXT),
+                  ("Weight", NUMBER), ("Qty", NUMBER), ("Remark", TEXT)],
+    "grn_entries": [("Date", TEXT), ("Qty Received", NUMBER), ("OK Qty", NUMBER),
+                    ("Rejected Qty", NUMBER), ("Remarks", TEXT), ("QC Approved By", TEXT)],
+}
+ITEM_COLUMNS = [c for c, _ in TABLE_SCHEMAS["items"]]
+MATERIAL_COLUMNS = [c for c, _ in TABLE_SCHEMAS["materials"]]
+GRN_COLUMNS = [c for c, _ in TABLE_SCHEMAS["grn_entries"]]
+
+_SCHEMA_BY_COLUMNS = {tuple(c for c, _ in schema): schema for schema in TABLE_SCHEMAS.values()}
+
+# Operation checklist on the form, in shop-floor order (the scheduler routes
+# jobs through the selected ones in this order)
+OPERATIONS = ["Cutting", "Turning (Traub/CNC)", "Milling", "Threading", "Drilling", "Punching", "Deburring",
+              "Plating", "Packing"]
+
+
+# -------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------
+def section_rows(rows, columns):
+    # Batch records may give table rows as dicts keyed by column name
+    if not rows:
+        return rows
+    return [[r.get(c, "") for c in columns] if isinstance(r, dict) else r for r in rows]
+
+def jobcard_qr_text(job_no, job_date, dispatch_location, vendor_id):
+    return f"JobNo: {job_no} | Date: {job_date} | Dispatch: {dispatch_location} | VendorID: {vendor_id}"
+
+def rows_to_df(rows, columns):
+    # One DataFrame per batch of rows: short rows are padded and long ones
+    # truncated by the constructor, not row by row. Columns of a known
+    # job-card table get their TABLE_SCHEMAS types.
+    import pandas as pd
+
+    n = len(columns)
+    if rows is None or len(rows) == 0:
+        df = pd.DataFrame({c: pd.Series(dtype=object) for c in columns})
+    else:
+        df = pd.DataFrame([() if r is None else r for r in rows], dtype=object)
+        df = df.iloc[:, :n].reindex(columns=range(n))
+        df.columns = columns
+    schema = _SCHEMA_BY_COLUMNS.get(tuple(columns))
+    if schema is None:
+        return df.fillna("")
+    return apply_schema(df, schema)
+
+# Commas are read as digit grouping only where they can be: thousands
+# (1,234,567) or lakhs (12,34,567). "1,5" is not a number rather than 15.
+_GROUPED_NUMBER = r"[+-]?(?:\d{1,3}(?:,\d{3})+|\d{1,2}(?:,\d{2})*,\d{3})(?:\.\d*)?"
+
+def parse_numbers(values):
+    # Series of numbers / number text -> float Series, NaN for blanks and
+    # anything that is not a number. Shared by the form, the API and bulk
+    # import so they accept the same values.
+    import pandas as pd
+
+    text = values.astype(object).where(values.notna(), "").astype(str).str.strip()
+    commas = text.str.contains(",", regex=False)
+    text = text.mask(commas & ~text.str.fullmatch(_GROUPED_NUMBER), "")
+    text = text.str.replace(",", "", regex=False)
+    return pd.to_numeric(text.mask(text.eq("")), errors="coerce").astype(float)
+
+def apply_schema(df, schema):
+    import pandas as pd
+
+    typed = {}
+    for column, col_type in schema:
+        values = df[column]
+        if col_type == NUMBER:
+            typed[column] = parse_numbers(values)
+        elif col_type == CATEGORY:
+            typed[column] = values.fillna("").astype(str).astype("category")
+        else:
+            typed[column] = values.fillna("")
+    return pd.DataFrame(typed, index=df.index)
+
+# total name -> (table, column) it sums
+TOTAL_COLUMNS = {
+    "Item Qty": ("items", "Qty"),
+    "Material Weight": ("materials", "Weight"),
+    "Material Qty": ("materials", "Qty"),
+    "Qty Received": ("grn_entries", "Qty Received"),
+    "OK Qty": ("grn_entries", "OK Qty"),
+    "Rejected Qty": ("grn_entries", "Rejected Qty"),
+}
+
+def jobcard_totals(items_df, materials_df, grn_df):
+    # Column sums over the job-card tables (blanks and text count as zero);
+    # None when a frame lacks one of the TOTAL_COLUMNS, e.g. a caller's own
+    # table layout
+    import pandas as pd
+
+    frames = {"items": items_df, "materials": materials_df, "grn_entries": grn_df}
+    if any(column not in frames[table].columns for table, column in TOTAL_COLUMNS.values()):
+        return None
+    return summarize_totals({
+        name: pd.to_numeric(frames[table][column], errors="coerce").sum()
+        for name, (table, column) in TOTAL_COLUMNS.items()
+    })
+
+def summarize_totals(sums):
+    totals = {name: float(value or 0) for name, value in sums.items()}
+    received = totals["Qty Received"]
+    totals["Rejection %"] = 100.0 * totals["Rejected Qty"] / received if received else 0.0
+    return totals
+
+def format_number(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    # Two decimals at most, without trailing zeros (2.001 -> "2")
+    value = round(float(value), 2) + 0.0  # + 0.0 turns -0.0 into 0.0
+    if value.is_integer():
+        return f"{int(value):,}"
+    return f"{value:,.2f}".rstrip("0")
@@ -1,472 +1,409 @@
-import base64
+import os
+import secrets
 import streamlit as st
-import pandas as pd
-import qrcode
 from io import BytesIO
-from PIL import Image
-from reportlab.platypus import Image as RLImage  # only used earlier; left for compatibility
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
 from datetime import date as dt_date
+from functools import partial
+from jobcard_schema import GRN_COLUMNS, OPERATIONS, jobcard_qr_text, format_number
+from jobcard_repo import open_repository
+from erp_masters import open_master_data
+
+# ReportLab (PDF export), qrcode (QR preview) and pandas/openpyxl (tables,
+# bulk import) are imported inside the functions that use them, so a cold
+# start only pays for what the open tab shows.
 
 st.set_page_config(page_title="Dynamic Vendor Job Card", layout="wide")
 PRIMARY_COLOR = "#0d6efd"
 
-# -----------------------------
-# Safe session state initialization
-# -----------------------------
-if 'items' not in st.session_state or not isinstance(st.session_state['items'], list):
-    st.session_state['items'] = []
-if 'materials' not in st.session_state or not isinstance(st.session_state['materials'], list):
-    st.session_state['materials'] = []
-if 'grn_entries' not in st.session_state or not isinstance(st.session_state['grn_entries'], list):
-    st.session_state['grn_entries'] = []
+PAGE_SIZE = 50
 
 # -----------------------------
-# Helper functions
+# Form state
 # -----------------------------
-def make_qr_bytes(data):
-    qr = qrcode.QRCode(box_size=4)
-    qr.add_data(data)
-    qr.make()
-    img = qr.make_image(fill_color="black", back_color="white")
+# Every form widget is keyed "f_..." so its value lives in session_state.
+# Input sections run as fragments (a keystroke reruns only its section) and
+# the tabs are lazy (only the open tab runs), so Preview/Export read the
+# values from here instead of from widget return values.
+# Line items are stored under the card number, so each new form gets a
+# number of its own until the user enters one; a shared default would have
+# every session editing (and clearing) the same card.
+FORM_DEFAULTS = {
+    "f_job_no": f"JC-{dt_date.today().strftime('%Y%m%d')}-{secrets.token_hex(3).upper()}",
+    "f_job_date": dt_date.today(),
+    "f_expected_date": dt_date.today(),
+    "f_qty": 0,
+    "f_uom": "Nos",
+    "f_weight": 0,
+    "f_mqty": 0,
+    **{f"f_grn_{i}": 0 for i in range(1, len(GRN_COLUMNS))},
+}
+for key, value in FORM_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+# Widgets that are not rendered in a run (closed tab, hidden machine
+# details) would have their state dropped; re-assigning keeps it.
+for key in [k for k in st.session_state if k.startswith("f_")]:
+    st.session_state[key] = st.session_state[key]
+
+def form(key, default=""):
+    return st.session_state.get(f"f_{key}", default)
+
+def store_logo():
+    # The uploader widget is reset when its tab is closed, so keep the bytes
+    upload = st.session_state.get("logo_upload")
+    st.session_state["logo_bytes"] = upload.getvalue() if upload is not None else None
+
+@st.cache_data(max_entries=256)
+def qr_png(text):
+    # Straight from qrcode rather than jobcard_pdf, which would pull in
+    # ReportLab just to show the preview image
+    import qrcode
+
     buf = BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return buf.getvalue(), img
-
-def rows_to_df(rows, columns):
-    if rows is None or len(rows) == 0:
-        return pd.DataFrame(columns=columns)
-    safe_rows = []
-    for r in rows:
-        if r is None:
-            r = [""] * len(columns)
-        elif len(r) < len(columns):
-            r = r + [""] * (len(columns) - len(r))
-        elif len(r) > len(columns):
-            r = r[:len(columns)]
-        safe_rows.append(r)
-    return pd.DataFrame(safe_rows, columns=columns)
+    qrcode.make(text, box_size=4).save(buf, format="PNG")
+    return buf.getvalue()
+
+def current_qr_text():
+    return jobcard_qr_text(form("job_no"), form("job_date"), form("dispatch_location"), form("vendor_id"))
+
+def selected_operations():
+    return [op for op in OPERATIONS if st.session_state.get(f"f_op_{op}")]
+
+def machine_details():
+    if not form("show_machine", False):
+        return {}
+    details = {"Machine Type": form("machine_type", "Traub"), "Cycle Time": form("cycle_time"),
+               "RPM": form("rpm"), "Feed": form("feed")}
+    if details["Machine Type"] == "Traub":
+        details["Traub Gear Setup"] = form("gear_setup")
+    return details
 
 # -----------------------------
-# Tabs
+# Server-side job card storage
 # -----------------------------
-tab1, tab2, tab3 = st.tabs(["Input", "Preview", "PDF Export"])
+# Line items live in the ERP store under the Job Card No, not in
+# st.session_state; the UI only fetches the page it shows.
+@st.cache_resource
+def get_repository():
+    return open_repository()
+
+@st.cache_data(max_entries=256)
+def load_page(job_no, section, page, page_size, version):
+    # `version` changes whenever the section's rows change, so unchanged
+    # sections come straight from the cache instead of being re-converted
+    return get_repository().page(job_no, section, page, page_size)
+
+def show_section(job_no, section, key):
+    repo = get_repository()
+    version = repo.section_version(job_no, section)
+    total = version[0]
+    if total == 0:
+        return False
+    pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages}, {total} rows)", min_value=1, max_value=pages,
+                               value=1, key=f"{key}_page")
+    st.dataframe(load_page(job_no, section, page, PAGE_SIZE, version), use_container_width=True)
+    return True
 
 # -----------------------------
-# TAB 1: Input
+# Master-data lookup
 # -----------------------------
-with tab1:
-    st.markdown(f"<h1 style='color:{PRIMARY_COLOR}'>Vendor Job Card Input</h1>", unsafe_allow_html=True)
+# Indexes over Vendor/Item/Customer Master, built once per server. A lookup
+# checks its own master for new rows at most every MASTER_REFRESH_SECONDS,
+# so typing a query does not hit the store on each keystroke.
+MASTER_REFRESH_SECONDS = 10
+
+@st.cache_resource
+def get_master_data():
+    return open_master_data(get_repository().store)
+
+# master -> {form key: master column} filled in when a match is picked
+LOOKUP_FILLS = {
+    "vendor": {"f_vendor_id": "Vendor ID", "f_vendor_company": "Vendor Name",
+               "f_vendor_mobile": "Phone", "f_vendor_gst": "GST"},
+    "item": {"f_desc": "Item Name", "f_drawing_no": "Item Code", "f_grade": "Category", "f_uom": "Unit"},
+    "customer": {"f_dispatch_location": "Customer Name"},
+}
+
+def fill_from_master(name):
+    row = st.session_state.get(f"{name}_pick")
+    if row:
+        for key, column in LOOKUP_FILLS[name].items():
+            if row.get(column) not in (None, ""):
+                st.session_state[key] = row[column]
+
+def master_lookup(name, label, describe):
+    query = st.text_input(label, key=f"{name}_query")
+    if not query:
+        return
+    masters = get_master_data()
+    masters.refresh(name, max_age=MASTER_REFRESH_SECONDS)
+    matches = masters.search(name, query, limit=8)
+    if not matches:
+        st.caption("No matches")
+        return
+    st.selectbox(f"{len(matches)} match(es)", matches, format_func=describe, index=None,
+                 key=f"{name}_pick", on_change=fill_from_master, args=(name,))
+
+def bulk_import(job_no, section):
+    # Appends every row of an uploaded CSV/XLSX (form column headers) at once
+    with st.expander("Bulk import (CSV / Excel)"):
+        upload = st.file_uploader("Rows file", type=["csv", "xlsx"], key=f"{section}_bulk_file")
+        skip = st.checkbox("Skip invalid rows", key=f"{section}_bulk_skip")
+        if upload is None or not st.button("Import rows", key=f"{section}_bulk_import"):
+            return
+        import pandas as pd
+        from jobcard_import import import_section_rows
+
+        try:
+            added, result = import_section_rows(get_repository(), job_no, section, upload, skip_invalid=skip)
+        except ValueError as exc:
+            st.error(str(exc))
+            return
+        if result.ignored_columns:
+            st.caption(f"Ignored columns: {', '.join(result.ignored_columns)}")
+        if result.errors:
+            st.warning(f"{len(result.errors)} value(s) are not numbers"
+                       + ("; those rows were skipped" if skip else "; nothing was imported"))
+            st.dataframe(pd.DataFrame(result.errors, columns=["Line", "Column", "Value"]), hide_index=True)
+        if added:
+            st.success(f"Imported {added} rows")
 
-    # Company Header
+# -----------------------------
+# TAB 1: Input sections (one fragment each)
+# -----------------------------
+@st.fragment
+def company_header_section():
     st.subheader("Company Header")
     col_logo, col_name = st.columns([1,5])
     with col_logo:
-        logo_file = st.file_uploader("Upload Company Logo", type=["png","jpg","jpeg"])
-        logo_bytes = None
-        logo_b64 = ""
-        if logo_file is not None:
-            # read bytes once and keep for reuse
-            logo_bytes = logo_file.read()
-            logo_b64 = base64.b64encode(logo_bytes).decode("utf-8")
+        st.file_uploader("Upload Company Logo", type=["png","jpg","jpeg"], key="logo_upload", on_change=store_logo)
     with col_name:
-        company_name = st.text_input("Your Company Name")
-        company_address = st.text_area("Your Company Address")
+        st.text_input("Your Company Name", key="f_company_name")
+        st.text_area("Your Company Address", key="f_company_address")
 
-    # Vendor Details
+@st.fragment
+def vendor_job_section():
+    # Vendor ID and the job fields feed the QR code, so they share a fragment
     st.subheader("Vendor Details")
+    master_lookup("vendor", "Find vendor (ID or name)",
+                  lambda r: f"{r['Vendor ID']} - {r['Vendor Name'] or ''}")
     colv1, colv2 = st.columns(2)
     with colv1:
-        vendor_id = st.text_input("Vendor ID")
-        vendor_company = st.text_input("Vendor Company Name")
-        vendor_person = st.text_input("Contact Person")
-        vendor_mobile = st.text_input("Mobile Number")
+        st.text_input("Vendor ID", key="f_vendor_id")
+        st.text_input("Vendor Company Name", key="f_vendor_company")
+        st.text_input("Contact Person", key="f_vendor_person")
+        st.text_input("Mobile Number", key="f_vendor_mobile")
     with colv2:
-        vendor_gst = st.text_input("GST Number")
-        vendor_address = st.text_area("Vendor Address")
+        st.text_input("GST Number", key="f_vendor_gst")
+        st.text_area("Vendor Address", key="f_vendor_address")
 
-    # Job Details
     st.subheader("Job Details")
     col1, col2, col3 = st.columns(3)
     with col1:
-        job_no = st.text_input("Job Card No.", value=f"JC-{dt_date.today().strftime('%Y%m%d')}")
+        st.text_input("Job Card No.", key="f_job_no")
     with col2:
-        job_date = st.date_input("Date", dt_date.today())
+        st.date_input("Date", key="f_job_date")
     with col3:
-        dispatch_location = st.text_input("Dispatch Location")
+        master_lookup("customer", "Find customer",
+                      lambda r: f"{r['Customer ID']} - {r['Customer Name'] or ''}")
+        st.text_input("Dispatch Location", key="f_dispatch_location")
 
     # QR Code
-    qr_text_input = f"JobNo: {job_no} | Date: {job_date} | Dispatch: {dispatch_location} | VendorID: {vendor_id}"
-    qr_bytes, qr_img = make_qr_bytes(qr_text_input)
-    st.image(qr_bytes, width=120, caption="QR Code Preview")
+    st.image(qr_png(current_qr_text()), width=120, caption="QR Code Preview")
 
-    # Item Table
+@st.fragment
+def items_section():
     st.subheader("Item Details")
+    job_no = form("job_no")
+    master_lookup("item", "Find item (code or name)",
+                  lambda r: f"{r['Item Code']} - {r['Item Name'] or ''} ({r['Category'] or '-'})")
     new_item = st.columns([1,1,1,1,1,1])
-    desc = new_item[0].text_input("Description")
-    drawing_no = new_item[1].text_input("Drawing No")
-    drawing_link = new_item[2].text_input("Drawing Link")
-    grade = new_item[3].text_input("Grade")
-    qty = new_item[4].number_input("Qty", value=0, min_value=0)
-    uom = new_item[5].text_input("UOM", value="Nos")
+    new_item[0].text_input("Description", key="f_desc")
+    new_item[1].text_input("Drawing No", key="f_drawing_no")
+    new_item[2].text_input("Drawing Link", key="f_drawing_link")
+    new_item[3].text_input("Grade", key="f_grade")
+    new_item[4].number_input("Qty", min_value=0, key="f_qty")
+    new_item[5].text_input("UOM", key="f_uom")
     if st.button("Add Item"):
-        if 'items' not in st.session_state or not isinstance(st.session_state['items'], list):
-            st.session_state['items'] = []
-        st.session_state['items'].append([desc, drawing_no, drawing_link, grade, qty, uom])
-    if st.session_state['items']:
-        st.dataframe(rows_to_df(st.session_state['items'], ["Description","Drawing No","Drawing Link","Grade","Qty","UOM"]), use_container_width=True)
-        if st.button("Clear Items"):
-            st.session_state['items'] = []
-
-    # Material Issued
+        row = [form("desc"), form("drawing_no"), form("drawing_link"), form("grade"), form("qty", 0), form("uom")]
+        get_repository().add_rows(job_no, "items", [row])
+    bulk_import(job_no, "items")
+    if show_section(job_no, "items", "input_items"):
+        st.button("Clear Items", on_click=get_repository().clear, args=(job_no, "items"))
+
+@st.fragment
+def materials_section():
     st.subheader("Material Issued")
+    job_no = form("job_no")
     new_mat = st.columns([1,1,1,1,1,1])
-    rm = new_mat[0].text_input("Raw Material")
-    heat = new_mat[1].text_input("Heat No")
-    dia = new_mat[2].text_input("Dia/Size")
-    weight = new_mat[3].number_input("Weight", value=0)
-    mqty = new_mat[4].number_input("Qty", value=0)
-    remark = new_mat[5].text_input("Remark")
+    new_mat[0].text_input("Raw Material", key="f_rm")
+    new_mat[1].text_input("Heat No", key="f_heat")
+    new_mat[2].text_input("Dia/Size", key="f_dia")
+    new_mat[3].number_input("Weight", key="f_weight")
+    new_mat[4].number_input("Qty", key="f_mqty")
+    new_mat[5].text_input("Remark", key="f_remark")
     if st.button("Add Material"):
-        if 'materials' not in st.session_state or not isinstance(st.session_state['materials'], list):
-            st.session_state['materials'] = []
-        st.session_state['materials'].append([rm, heat, dia, weight, mqty, remark])
-    if st.session_state['materials']:
-        st.dataframe(rows_to_df(st.session_state['materials'], ["Raw Material","Heat No","Dia/Size","Weight","Qty","Remark"]), use_container_width=True)
-        if st.button("Clear Materials"):
-            st.session_state['materials'] = []
-
+        row = [form("rm"), form("heat"), form("dia"), form("weight", 0), form("mqty", 0), form("remark")]
+        get_repository().add_rows(job_no, "materials", [row])
+    bulk_import(job_no, "materials")
+    if show_section(job_no, "materials", "input_materials"):
+        st.button("Clear Materials", on_click=get_repository().clear, args=(job_no, "materials"))
+
+@st.fragment
+def instructions_section():
     # Operations
     st.subheader("Operation Checklist")
-    operations = ["Cutting","Turning (Traub/CNC)","Milling","Threading","Drilling","Punching","Deburring","Plating","Packing"]
-    op_selected = {op: st.checkbox(op) for op in operations}
+    for op in OPERATIONS:
+        st.checkbox(op, key=f"f_op_{op}")
 
     # Machine Details
     st.subheader("Machine Specific Details (Optional)")
-    show_machine = st.checkbox("Show Machine Details")
-    machine_details = {}
-    if show_machine:
-        machine_type = st.selectbox("Machine Type", ["Traub", "CNC", "VMC", "Lathe", "Milling"])
-        cycle_time = st.text_input("Cycle Time (sec)")
-        rpm = st.text_input("RPM")
-        feed = st.text_input("Feed Rate")
-        machine_details = {"Machine Type": machine_type, "Cycle Time": cycle_time, "RPM": rpm, "Feed": feed}
+    if st.checkbox("Show Machine Details", key="f_show_machine"):
+        machine_type = st.selectbox("Machine Type", ["Traub", "CNC", "VMC", "Lathe", "Milling"], key="f_machine_type")
+        st.text_input("Cycle Time (sec)", key="f_cycle_time")
+        st.text_input("RPM", key="f_rpm")
+        st.text_input("Feed Rate", key="f_feed")
         if machine_type == "Traub":
-            gear_setup = st.text_input("Traub Gear Setup")
-            machine_details["Traub Gear Setup"] = gear_setup
+            st.text_input("Traub Gear Setup", key="f_gear_setup")
 
     # Quality
     st.subheader("Quality Instructions")
-    tolerance = st.text_input("Tolerance")
-    surface_finish = st.text_input("Surface Finish")
-    hardness = st.text_input("Hardness Requirement")
-    thread_check = st.checkbox("Thread GO/NO-GO")
+    st.text_input("Tolerance", key="f_tolerance")
+    st.text_input("Surface Finish", key="f_surface_finish")
+    st.text_input("Hardness Requirement", key="f_hardness")
+    st.checkbox("Thread GO/NO-GO", key="f_thread_check")
 
     # Delivery
     st.subheader("Delivery Schedule")
-    expected_date = st.date_input("Expected Delivery Date")
+    st.date_input("Expected Delivery Date", key="f_expected_date")
 
-    # Goods Received / QC
+@st.fragment
+def grn_section():
     st.subheader("Goods Received / QC")
-    grn_cols = ["Date","Qty Received","OK Qty","Rejected Qty","Remarks","QC Approved By"]
+    job_no = form("job_no")
     grn_new = st.columns([1,1,1,1,1,1])
-    grn_vals = [grn_new[i].text_input(grn_cols[i]) if i==0 else grn_new[i].number_input(grn_cols[i], value=0) for i in range(6)]
+    for i, col in enumerate(GRN_COLUMNS):
+        if i == 0:
+            grn_new[i].text_input(col, key=f"f_grn_{i}")
+        else:
+            grn_new[i].number_input(col, key=f"f_grn_{i}")
     if st.button("Add GRN Entry"):
-        if 'grn_entries' not in st.session_state or not isinstance(st.session_state['grn_entries'], list):
-            st.session_state['grn_entries'] = []
-        st.session_state['grn_entries'].append(grn_vals)
-    if st.session_state['grn_entries']:
-        st.dataframe(rows_to_df(st.session_state['grn_entries'], grn_cols), use_container_width=True)
-        if st.button("Clear GRN Entries"):
-            st.session_state['grn_entries'] = []
+        grn_vals = [form(f"grn_{i}") for i in range(len(GRN_COLUMNS))]
+        get_repository().add_rows(job_no, "grn_entries", [grn_vals])
+    bulk_import(job_no, "grn_entries")
+    if show_section(job_no, "grn_entries", "input_grn"):
+        st.button("Clear GRN Entries", on_click=get_repository().clear, args=(job_no, "grn_entries"))
 
-# -----------------------------
-# TAB 2: Preview (HTML-based, PDF friendly)
-# -----------------------------
-# -----------------------------
-# TAB 2: Preview (FIXED)
-# -----------------------------
 # -----------------------------
 # TAB 2: Preview
 # -----------------------------
-with tab2:
+def preview():
     st.markdown(f"<h1 style='color:{PRIMARY_COLOR}'>Preview Job Card</h1>", unsafe_allow_html=True)
+    job_no = form("job_no")
     col_logo, col_header = st.columns([1,5])
-    with col_logo: 
-        if logo_file: st.image(logo_file, width=80)
-    with col_header: st.markdown(f"**{company_name}**\n\n{company_address}")
+    with col_logo:
+        if st.session_state.get("logo_bytes"): st.image(st.session_state["logo_bytes"], width=80)
+    with col_header: st.markdown(f"**{form('company_name')}**\n\n{form('company_address')}")
     st.markdown("---")
     st.subheader("Vendor Details")
     st.markdown(f"""
-    **Vendor ID:** {vendor_id}  
-    **Company:** {vendor_company}  
-    **Contact Person:** {vendor_person}  
-    **Mobile:** {vendor_mobile}  
-    **GST:** {vendor_gst}  
-    **Address:** {vendor_address}
+    **Vendor ID:** {form('vendor_id')}  
+    **Company:** {form('vendor_company')}  
+    **Contact Person:** {form('vendor_person')}  
+    **Mobile:** {form('vendor_mobile')}  
+    **GST:** {form('vendor_gst')}  
+    **Address:** {form('vendor_address')}
     """)
     st.markdown("---")
     st.subheader("Job Details")
-    st.markdown(f"**Job No:** {job_no}  \n**Date:** {job_date}  \n**Dispatch Location:** {dispatch_location}")
-    st.image(qr_bytes, width=150, caption="QR Code")
+    st.markdown(f"**Job No:** {job_no}  \n**Date:** {form('job_date')}  \n**Dispatch Location:** {form('dispatch_location')}")
+    st.image(qr_png(current_qr_text()), width=150, caption="QR Code")
     st.subheader("Item Details")
-    st.dataframe(rows_to_df(st.session_state['items'], ["Description","Drawing No","Drawing Link","Grade","Qty","UOM"]), use_container_width=True)
+    if not show_section(job_no, "items", "preview_items"): st.write("None")
     st.subheader("Material Issued")
-    st.dataframe(rows_to_df(st.session_state['materials'], ["Raw Material","Heat No","Dia/Size","Weight","Qty","Remark"]), use_container_width=True)
+    if not show_section(job_no, "materials", "preview_materials"): st.write("None")
     st.subheader("Operations")
-    st.write(', '.join([op for op, sel in op_selected.items() if sel]) or "None")
-    if show_machine and machine_details:
+    st.write(', '.join(selected_operations()) or "None")
+    details = machine_details()
+    if details:
         st.subheader("Machine Details")
-        for k,v in machine_details.items(): st.write(f"**{k}:** {v}")
+        for k,v in details.items(): st.write(f"**{k}:** {v}")
     st.subheader("Quality Instructions")
-    st.write(f"Tolerance: {tolerance}")
-    st.write(f"Surface Finish: {surface_finish}")
-    st.write(f"Hardness: {hardness}")
-    if thread_check: st.write("Thread: GO/NO-GO Required")
+    st.write(f"Tolerance: {form('tolerance')}")
+    st.write(f"Surface Finish: {form('surface_finish')}")
+    st.write(f"Hardness: {form('hardness')}")
+    if form("thread_check", False): st.write("Thread: GO/NO-GO Required")
     st.subheader("Goods Received / QC")
-    st.dataframe(rows_to_df(st.session_state['grn_entries'], ["Date","Qty Received","OK Qty","Rejected Qty","Remarks","QC Approved By"]), use_container_width=True)
-# -----------------------------
-# TAB 3: PDF EXPORT (WeasyPrint)
-# -----------------------------
-# -----------------------------
-# TAB 3: PDF EXPORT (REPORTLAB)
-# -----------------------------
+    if not show_section(job_no, "grn_entries", "preview_grn"): st.write("None")
+    st.subheader("Totals")
+    totals = get_repository().totals(job_no)
+    for col, (name, value) in zip(st.columns(len(totals)), totals.items()):
+        col.metric(name, format_number(value))
+
 # -----------------------------
 # TAB 3: PDF EXPORT (ReportLab)
 # -----------------------------
-import base64
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
-)
-from reportlab.graphics.shapes import Drawing, Rect
-from reportlab.graphics.barcode import qr, code128
-from reportlab.pdfgen.canvas import Canvas
-
-
-# -------------------------------------------------------
-# PAGE NUMBERING FUNCTION
-# -------------------------------------------------------
-class NumberedCanvas(Canvas):
-    def __init__(self, *args, **kwargs):
-        Canvas.__init__(self, *args, **kwargs)
-        self._saved_page_states = []
-
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        Canvas.showPage(self)
-
-    def save(self):
-        num_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(num_pages)
-            Canvas.showPage(self)
-        Canvas.save(self)
-
-    def draw_page_number(self, page_count):
-        self.setFont("Helvetica", 9)
-        self.drawCentredString(300, 20, f"Page {self._pageNumber} of {page_count}")
-
-
-# -------------------------------------------------------
-# MAIN PDF GENERATOR FUNCTION
-# -------------------------------------------------------
-def generate_jobcard_pdf(
-    company_name, company_address, logo_file,
-    vendor_id, vendor_company, vendor_person, vendor_mobile, vendor_gst, vendor_address,
-    job_no, job_date, dispatch_location, qr_bytes,
-    items_df, materials_df, grn_df,
-    tolerance, surface_finish, hardness, thread_check
-):
-        
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4,
-                            rightMargin=30, leftMargin=30,
-                            topMargin=30, bottomMargin=30)
-
-    styles = getSampleStyleSheet()
-    story = []
-
-    # ---------------------------------------------------
-    # HEADER (Logo + Company Info)
-    # ---------------------------------------------------
-    story.append(Spacer(1, 10))
-
-    if logo_file:
-        img = Image(logo_file, width=80, height=80)
-        img.hAlign = "LEFT"
-
-        d = Drawing(100, 100)
-        d.add(Rect(0, 0, 90, 90, strokeColor=colors.HexColor("#003366"),
-                    fillColor=None, strokeWidth=2))
-        d.add(img)
-        story.append(d)
-
-    header_style = ParagraphStyle(
-        "header",
-        fontSize=18,
-        leading=22,
-        alignment=1,
-        textColor=colors.HexColor("#0A284B"),
-    )
-
-    story.append(Paragraph(f"<b>{company_name}</b>", header_style))
-    story.append(Paragraph(company_address, styles["Normal"]))
-    story.append(Spacer(1, 12))
-
-    # ---------------------------------------------------
-    # QR CODE + BARCODE + JOB INFO
-    # ---------------------------------------------------
-    barcode_value = f"{job_no}-{vendor_id}"
-    barcode = code128.Code128(barcode_value, barHeight=40, barWidth=1.2)
-
-    qr_img = None
-    if qr_bytes:
-        qr_img = Image(BytesIO(qr_bytes), width=100, height=100)
-
-    top_row = [
-        Paragraph(
-            f"""
-            <b>Job No:</b> {job_no}<br/>
-            <b>Date:</b> {job_date}<br/>
-            <b>Dispatch:</b> {dispatch_location}
-            """,
-            styles["Normal"]
-        ),
-        qr_img if qr_img else "",
-        barcode,
-    ]
-
-    top_table = Table([top_row], colWidths=[200, 120, 120])
-    top_table.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP")]))
-    story.append(top_table)
-    story.append(Spacer(1, 12))
-
-    # ---------------------------------------------------
-    # SUMMARY BOX
-    # ---------------------------------------------------
-    summary = Table([
-        [Paragraph("<b>Quality Summary</b>", styles["Heading4"])],
-        [f"Tolerance: {tolerance}"],
-        [f"Surface Finish: {surface_finish}"],
-        [f"Hardness: {hardness}"],
-        ["Thread Check: GO/NO-GO Required" if thread_check else "Thread: Not Applicable"]
-    ], colWidths=[450])
-
-    summary.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#DCE6F2")),
-        ("BOX", (0, 0), (-1, -1), 1, colors.HexColor("#003366")),
-        ("INNERGRID", (0, 0), (-1, -1), 0.2, colors.gray),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")
-    ]))
-
-    story.append(summary)
-    story.append(Spacer(1, 14))
-
-    # ---------------------------------------------------
-    # VENDOR DETAILS
-    # ---------------------------------------------------
-    story.append(Paragraph("<b>Vendor Details</b>", styles["Heading4"]))
-    vendor_html = f"""
-        <b>ID:</b> {vendor_id}<br/>
-        <b>Company:</b> {vendor_company}<br/>
-        <b>Contact Person:</b> {vendor_person}<br/>
-        <b>Mobile:</b> {vendor_mobile}<br/>
-        <b>GST:</b> {vendor_gst}<br/>
-        <b>Address:</b> {vendor_address}<br/>
-    """
-    story.append(Paragraph(vendor_html, styles["Normal"]))
-    story.append(Spacer(1, 12))
-
-    # ---------------------------------------------------
-    # ITEMS TABLE
-    # ---------------------------------------------------
-    story.append(Paragraph("<b>Item Details</b>", styles["Heading4"]))
-    items_table = Table([items_df.columns.tolist()] + items_df.values.tolist(), repeatRows=1)
-    items_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A284B")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.gray),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")
-    ]))
-    story.append(items_table)
-    story.append(Spacer(1, 14))
-
-    # ---------------------------------------------------
-    # MATERIAL TABLE
-    # ---------------------------------------------------
-    story.append(Paragraph("<b>Material Issued</b>", styles["Heading4"]))
-    materials_table = Table([materials_df.columns.tolist()] + materials_df.values.tolist(), repeatRows=1)
-    materials_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A284B")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.gray),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")
-    ]))
-    story.append(materials_table)
-    story.append(Spacer(1, 14))
-
-    # ---------------------------------------------------
-    # GRN TABLE
-    # ---------------------------------------------------
-    story.append(Paragraph("<b>Goods Received / QC</b>", styles["Heading4"]))
-    grn_table = Table([grn_df.columns.tolist()] + grn_df.values.tolist(), repeatRows=1)
-    grn_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0A284B")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.gray),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")
-    ]))
-    story.append(grn_table)
-    story.append(Spacer(1, 20))
-
-    # ---------------------------------------------------
-    # SIGNATURES
-    # ---------------------------------------------------
-    story.append(Paragraph("<b>Signatures</b>", styles["Heading4"]))
-    sig = Table([
-        ["__________________", "__________________", "__________________"],
-        ["Prepared By", "QC Approved", "Vendor Sign"]
-    ], colWidths=[150, 150, 150])
-    sig.setStyle(TableStyle([
-        ("ALIGN", (0, 0), (-1, 1), "CENTER")
-    ]))
-    story.append(sig)
-
-    # ---------------------------------------------------
-    # BUILD PDF
-    # ---------------------------------------------------
-    doc.build(story, canvasmaker=NumberedCanvas)
-
-    return buffer.getvalue()
-
-
-# -------------------------------------------------------
-# STREAMLIT - DOWNLOAD BUTTON
-# -------------------------------------------------------
-if st.button("📄 Download Premium PDF"):
-
-    pdf_data = generate_jobcard_pdf(
-        company_name, company_address, logo_file,
-        vendor_id, vendor_company, vendor_person, vendor_mobile, vendor_gst, vendor_address,
-        job_no, job_date, dispatch_location, qr_bytes,
-        rows_to_df(st.session_state["items"], ["Description","Drawing No","Drawing Link","Grade","Qty","UOM"]),
-        rows_to_df(st.session_state["materials"], ["Raw Material","Heat No","Dia/Size","Weight","Qty","Remark"]),
-        rows_to_df(st.session_state["grn_entries"], ["Date","Qty Received","OK Qty","Rejected Qty","Remarks","QC Approved By"]),
-        tolerance, surface_finish, hardness, thread_check
+PDF_FIELDS = ["company_name", "company_address", "vendor_id", "vendor_company", "vendor_person",
+              "vendor_mobile", "vendor_gst", "vendor_address", "job_no", "job_date",
+              "dispatch_location", "tolerance", "surface_finish", "hardness"]
+
+@st.cache_resource
+def get_render_cache():
+    # Shared by all sessions; set RENDER_CACHE_DIR to keep PDFs across restarts
+    from jobcard_cache import RenderCache
+
+    return RenderCache(disk_dir=os.environ.get("RENDER_CACHE_DIR"))
+
+def build_pdf(fields, logo_bytes, repo, qr_text):
+    job_no = fields["job_no"]
+    return get_render_cache().render(
+        fields["company_name"], fields["company_address"], logo_bytes,
+        fields["vendor_id"], fields["vendor_company"], fields["vendor_person"], fields["vendor_mobile"],
+        fields["vendor_gst"], fields["vendor_address"],
+        job_no, fields["job_date"], fields["dispatch_location"], None,
+        repo.section_df(job_no, "items"),
+        repo.section_df(job_no, "materials"),
+        repo.section_df(job_no, "grn_entries"),
+        fields["tolerance"], fields["surface_finish"], fields["hardness"], fields["thread_check"],
+        qr_text=qr_text
     )
 
+@st.fragment
+def pdf_export():
+    # The PDF is rendered only when the button is clicked and streamed to
+    # the browser from there; reruns never build or hold a copy of it
+    fields = {key: form(key) for key in PDF_FIELDS}
+    fields["thread_check"] = form("thread_check", False)
     st.download_button(
-        label="⬇ Download Job Card PDF",
-        data=pdf_data,
-        file_name=f"JobCard_{job_no}.pdf",
-        mime="application/pdf"
+        label="📄 Download Premium PDF",
+        data=partial(build_pdf, fields, st.session_state.get("logo_bytes"), get_repository(),
+                     current_qr_text()),
+        file_name=f"JobCard_{fields['job_no']}.pdf",
+        mime="application/pdf",
+        on_click="ignore"
     )
 
-
+# -----------------------------
+# Tabs (lazy: only the open tab runs)
+# -----------------------------
+tab1, tab2, tab3 = st.tabs(["Input", "Preview", "PDF Export"], on_change="rerun", key="active_tab")
+
+if tab1.open:
+    with tab1:
+        st.markdown(f"<h1 style='color:{PRIMARY_COLOR}'>Vendor Job Card Input</h1>", unsafe_allow_html=True)
+        company_header_section()
+        vendor_job_section()
+        items_section()
+        materials_section()
+        instructions_section()
+        grn_section()
+
+if tab2.open:
+    with tab2:
+        preview()
+
+if tab3.open:
+    with tab3:
+        pdf_export()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from erp_store import open_store
+from jobcard_repo import JobCardRepository
+
+
+@pytest.fixture
+def store_url(tmp_path):
+    # A file, not :memory:, so several connections (threads) share it
+    return f"sqlite:///{tmp_path / 'erp.db'}"
+
+
+@pytest.fixture
+def store(store_url):
+    store = open_store(store_url)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def repository(store):
+    return JobCardRepository(store)
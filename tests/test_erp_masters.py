@@ -0,0 +1,53 @@
+import threading
+
+from erp_masters import open_master_data
+
+
+def add_vendors(store, start, count):
+    store.insert_many("Vendor Master", ({"Vendor ID": f"V{i:05d}", "Vendor Name": f"Gear Works {i}"}
+                                        for i in range(start, start + count)))
+
+
+def test_refresh_checks_only_the_named_masters(store):
+    masters = open_master_data(store)
+    checked = []
+    version = store.version
+    store.version = lambda entity, **kwargs: checked.append(entity) or version(entity, **kwargs)
+    add_vendors(store, 0, 3)
+    assert masters.refresh("vendor") == {"vendor": 3}
+    assert checked == ["Vendor Master"]
+
+
+def test_refresh_skips_masters_checked_within_max_age(store):
+    masters = open_master_data(store)
+    add_vendors(store, 0, 3)
+    assert masters.refresh("vendor", max_age=60) == {}
+    assert masters.refresh("vendor") == {"vendor": 3}
+    assert len(masters.search("vendor", "gear works", limit=10)) == 3
+
+
+def test_concurrent_refresh_and_search(store):
+    masters = open_master_data(store)
+    errors = []
+
+    def writer():
+        for batch in range(20):
+            add_vendors(store, batch * 50, 50)
+            masters.refresh("vendor")
+
+    def reader():
+        try:
+            for _ in range(200):
+                masters.search("vendor", "gear", limit=5)
+                masters.search("vendor", "V000", limit=5)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    masters.refresh()
+    assert len(masters["vendor"]) == 1000
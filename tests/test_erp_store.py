@@ -0,0 +1,64 @@
+import sqlite3
+import threading
+
+import pytest
+
+from erp_store import SQLiteStore, open_store
+
+
+def run_together(count, target):
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run():
+        barrier.wait()
+        try:
+            target()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_create_schema_on_a_new_file(store_url):
+    assert run_together(8, lambda: open_store(store_url).close()) == []
+    store = open_store(store_url, create=False)
+    assert store.create_schema() == []
+    store.close()
+
+
+def test_concurrent_create_schema_adds_missing_columns(store_url, tmp_path):
+    open_store(store_url).close()
+    conn = sqlite3.connect(tmp_path / "erp.db")
+    conn.execute("DROP TABLE daily_production")
+    conn.execute("CREATE TABLE daily_production (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                 "rollup_key TEXT NOT NULL UNIQUE)")
+    conn.commit()
+    conn.close()
+
+    assert run_together(8, lambda: open_store(store_url).close()) == []
+    store = open_store(store_url, create=False)
+    assert store.create_schema() == []
+    store.insert("Daily Production", {"Rollup Key": "k", "Job Card No": "JC-1", "Entries": 1})
+    store.close()
+
+
+def test_failed_connect_returns_the_pool_slot(tmp_path):
+    store = SQLiteStore(str(tmp_path / "missing" / "erp.db"), pool_size=2)
+    for _ in range(5):
+        with pytest.raises(sqlite3.OperationalError):
+            store._acquire()
+    assert store._slots._value == 2
+
+
+def test_upsert_defaults_only_on_insert(store):
+    store.upsert("Job Cards", {"Job Card No": "JC-1"}, defaults={"Status": "Open"})
+    store.upsert("Job Cards", {"Job Card No": "JC-1", "Status": "Completed"})
+    store.upsert("Job Cards", {"Job Card No": "JC-1", "Machine": "M1"}, defaults={"Status": "Open"})
+    card = store.get("Job Cards", "JC-1")
+    assert card["Status"] == "Completed" and card["Machine"] == "M1"
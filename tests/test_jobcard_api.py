@@ -0,0 +1,124 @@
+import asyncio
+import base64
+import threading
+
+import pytest
+
+import jobcard_api
+from jobcard_api import LocalClient, create_app
+
+
+def card(job_no="JC-1", lines=1, **fields):
+    return {
+        "job_no": job_no, "company_name": "NPL", "vendor_id": "V1",
+        "items": [[f"Part {i}", "D-1", "", "SS304", i, "Nos"] for i in range(1, lines + 1)],
+        "materials": [["SS rod", "H1", "20", "1.5", 2, ""]],
+        "grn_entries": [["2026-10-17", 10, 9, 1, "", "QC"]],
+        **fields,
+    }
+
+
+@pytest.fixture
+def client(repository):
+    client = LocalClient(create_app(workers=1, queue=0, processes=False, repository=repository))
+    yield client
+    client.close()
+
+
+# -------------------------------------------------------
+# Validation
+# -------------------------------------------------------
+@pytest.mark.parametrize("fields", [
+    {"operations": 5},
+    {"operations": ["Cutting", 3]},
+    {"machine": [1]},
+    {"thread_check": "no"},
+    {"logo": base64.b64encode(b"not an image").decode()},
+    {"logo": "%%%"},
+    {"items": [["Part", "", "", "", "1,5", "Nos"]]},
+    {"colour": "red"},
+])
+def test_invalid_fields_are_422(client, fields):
+    status, _, body = client.post("/jobcards", card(**fields))
+    assert status == 422, body
+
+
+def test_missing_job_no_is_422(client):
+    payload = card()
+    del payload["job_no"]
+    assert client.post("/jobcards", payload)[0] == 422
+
+
+def test_grouped_numbers_are_accepted(client, repository):
+    status, headers, body = client.post("/jobcards", card(items=[["P", "", "", "", "1,000", "Nos"]]))
+    assert status == 200 and headers["content-type"] == "application/pdf" and body.startswith(b"%PDF")
+    assert repository.totals("JC-1")["Item Qty"] == 1000
+
+
+# -------------------------------------------------------
+# Backpressure
+# -------------------------------------------------------
+def test_full_render_queue_is_503(client, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    render = jobcard_api._render
+
+    def slow_render(record, logo):
+        started.set()
+        release.wait(10)
+        return render(record, logo)
+
+    monkeypatch.setattr(jobcard_api, "_render", slow_render)
+
+    async def scenario():
+        first = asyncio.ensure_future(client.arequest("POST", "/jobcards", card("JC-1")))
+        await asyncio.to_thread(started.wait, 10)
+        second = await client.arequest("POST", "/jobcards", card("JC-2"))
+        release.set()
+        return await first, second
+
+    (status1, _, _), (status2, headers2, _) = client.loop.run_until_complete(scenario())
+    assert status1 == 200
+    assert status2 == 503 and headers2["retry-after"] == "1"
+    metrics = client.app.state.pool.metrics()
+    assert metrics["rejected"] == 1 and metrics["completed"] == 1 and metrics["queue_depth"] == 0
+
+
+# -------------------------------------------------------
+# Saving
+# -------------------------------------------------------
+def test_failed_save_leaves_the_previous_card(client, repository, monkeypatch):
+    assert client.post("/jobcards", card(lines=2))[0] == 200
+    add_rows = repository.add_rows
+
+    def failing_add_rows(job_no, section, rows, conn=None):
+        if section == "grn_entries":
+            raise RuntimeError("disk full")
+        return add_rows(job_no, section, rows, conn=conn)
+
+    monkeypatch.setattr(repository, "add_rows", failing_add_rows)
+    with pytest.raises(RuntimeError):
+        client.post("/jobcards", card(lines=5))
+    assert repository.count_rows("JC-1", "items") == 2
+    assert repository.count_rows("JC-1", "grn_entries") == 1
+
+
+def test_concurrent_saves_of_one_card_do_not_mix(repository):
+    client = LocalClient(create_app(workers=4, queue=8, processes=False, repository=repository))
+    try:
+        async def scenario():
+            return await asyncio.gather(*(client.arequest("POST", "/jobcards", card(lines=n))
+                                          for n in (3, 5, 7, 9)))
+
+        assert [status for status, _, _ in client.loop.run_until_complete(scenario())] == [200] * 4
+    finally:
+        client.close()
+    rows = list(repository.iter_rows("JC-1", "items"))
+    assert len(rows) in (3, 5, 7, 9)
+    assert [row[4] for row in rows] == list(range(1, len(rows) + 1))
+    assert repository.count_rows("JC-1", "materials") == 1
+
+
+def test_save_keeps_the_card_status(client, repository):
+    repository.store.upsert("Job Cards", {"Job Card No": "JC-1", "Status": "Completed"})
+    assert client.post("/jobcards", card())[0] == 200
+    assert repository.store.get("Job Cards", "JC-1")["Status"] == "Completed"
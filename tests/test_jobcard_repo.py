@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+ITEM = ["Part", "D-1", "", "SS304", 1, "Nos"]
+
+
+def test_add_rows_keeps_the_card_status(repository):
+    repository.store.upsert("Job Cards", {"Job Card No": "PL1-01", "Status": "Completed", "Machine": "M1"})
+    repository.add_rows("PL1-01", "items", [ITEM])
+    card = repository.store.get("Job Cards", "PL1-01")
+    assert card["Status"] == "Completed" and card["Machine"] == "M1"
+
+
+def test_new_cards_start_open(repository):
+    repository.add_rows("JC-1", "items", [ITEM])
+    assert repository.store.get("Job Cards", "JC-1")["Status"] == "Open"
+
+
+def test_line_numbers_continue_after_the_highest(repository):
+    repository.add_rows("JC-1", "items", [ITEM] * 3)
+    repository.store.delete("Job Card Items", where={"Job Card No": "JC-1", "Line No": 1})
+    repository.add_rows("JC-1", "items", [ITEM])
+    lines = [r["Line No"] for r in repository.store.iter_rows("Job Card Items", order_by=["Line No"])]
+    assert lines == [2, 3, 4]
+
+
+def test_concurrent_appends_get_distinct_line_numbers(repository):
+    def append():
+        for _ in range(20):
+            repository.add_rows("JC-1", "items", [ITEM, ITEM])
+
+    threads = [threading.Thread(target=append) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    lines = sorted(r["Line No"] for r in repository.store.iter_rows("Job Card Items"))
+    assert lines == list(range(1, 161))
+
+
+def test_form_sessions_get_their_own_card_number(tmp_path, monkeypatch):
+    testing = pytest.importorskip("streamlit.testing.v1")
+    monkeypatch.chdir(tmp_path)  # the app opens its default store in the working directory
+    numbers = set()
+    for _ in range(2):
+        app = testing.AppTest.from_file("../streamlit_job_card_app.py", default_timeout=60)
+        app.run()
+        assert not app.exception
+        numbers.add(app.session_state["f_job_no"])
+    assert len(numbers) == 2